@@ -3,30 +3,58 @@ Bot configuration
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
-from types import SimpleNamespace
+from types import MappingProxyType
 
 # Paths
 BASE_DIR = Path(__file__).parent
 
-# Load environment variables explicitly from project .env
-load_dotenv(BASE_DIR / ".env")
+_env_loaded = False
 
-# Telegram API
-API_ID = int(os.getenv('API_ID', 0))
-API_HASH = os.getenv('API_HASH', '')
-BOT_TOKEN = os.getenv('BOT_TOKEN', '')
+def _load_env() -> None:
+    """Load the project .env once, on first setting access"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / ".env")
+    _env_loaded = True
 
-# Admin configuration
-ADMIN_IDS = os.getenv('ADMIN_IDS', '')
+def _read_setting(table: dict, name: str):
+    """Read and convert one environment-backed setting"""
+    env_name, caster, default = table[name]
+    _load_env()
+    raw = os.getenv(env_name)
+    if raw is None or raw == '':
+        return default
+    return caster(raw)
 
-# MongoDB
-MONGODB_URL = os.getenv('MONGODB_URL', 'mongodb://localhost:27017')
+# Environment-backed settings, resolved lazily by __getattr__ below:
+# name -> (env var, caster, default)
+_SETTINGS = {
+    # Telegram API
+    'API_ID': ('API_ID', int, 0),
+    'API_HASH': ('API_HASH', str, ''),
+    'BOT_TOKEN': ('BOT_TOKEN', str, ''),
+    # Admin configuration
+    'ADMIN_IDS': ('ADMIN_IDS', str, ''),
+    # MongoDB
+    'MONGODB_URL': ('MONGODB_URL', str, 'mongodb://localhost:27017'),
+    # Bot settings
+    'MAX_FILE_SIZE': ('MAX_FILE_SIZE', int, 2147483648),  # 2GB
+    'MAX_BATCH_FILES': ('MAX_BATCH_FILES', int, 24),
+    'AUTO_DELETE_DELAY': ('AUTO_DELETE_DELAY', int, 300),  # 5 minutes
+    # Simultaneous Telegram file transfers (Pyrogram defaults to 1, which
+    # would serialize the batch workers and parallel download ranges)
+    'MAX_CONCURRENT_TRANSMISSIONS': ('MAX_CONCURRENT_TRANSMISSIONS', int, 8),
+}
 
-# Bot settings
-MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 2147483648))  # 2GB
-MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', 24))
-AUTO_DELETE_DELAY = int(os.getenv('AUTO_DELETE_DELAY', 300))  # 5 minutes
+def __getattr__(name: str):
+    """Resolve settings on first access (PEP 562) and memoize them"""
+    if name in _SETTINGS:
+        value = _read_setting(_SETTINGS, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Directories
 TEMP_DIR = BASE_DIR / "temp_files"
@@ -34,8 +62,7 @@ BANNERS_DIR = BASE_DIR / "banners"
 DATA_DIR = BASE_DIR / "data"
 
 # Messages
-MESSAGES = {
-    'start': """👋 Welcome to Advanced PDF Tools Bot!
+START_MESSAGE = """👋 Welcome to Advanced PDF Tools Bot!
 
 Send me a PDF and I'll help you clean, edit, add banner and lock it.
 
@@ -55,30 +82,50 @@ Send me a PDF and I'll help you clean, edit, add banner and lock it.
 /setpassword - Set default lock password
 /status - Check bot status
 
-📤 Just send me a PDF to get started!""",
+📤 Just send me a PDF to get started!"""
+
+MESSAGES = MappingProxyType({
+    'start': START_MESSAGE,
     'not_pdf': "❌ This is not a PDF file!",
     'file_too_big': "❌ File is too large!",
     'processing': "⏳ Processing...",
     'success_unlock': "✅ PDF unlocked successfully!",
     'success_pages': "✅ Pages removed successfully!",
-    'error': "❌ Error during processing"
-}
+    'error': "❌ Error during processing",
+})
+
+class _LazyConfig:
+    """Config namespace whose values are parsed on first attribute access"""
+
+    # name -> (env var, caster, default)
+    _fields = {
+        # Playwright / scraping
+        'headless': ('SCRIBD_HEADLESS', lambda v: v.strip() not in {'0', 'false', 'False'}, True),
+        'device_scale_factor': ('DEVICE_SCALE_FACTOR', int, 2),
+        'sel_timeout_ms': ('SEL_TIMEOUT_MS', int, 30000),
+        'nav_timeout_ms': ('NAV_TIMEOUT_MS', int, 60000),
+        'scroll_timeout': ('SCROLL_TIMEOUT', int, 180),
+        # HTTP
+        'http_timeout': ('HTTP_TIMEOUT', int, 60),
+        'download_batch_size': ('DOWNLOAD_BATCH_SIZE', int, 5),
+        # PDF
+        'pdf_quality': ('PDF_QUALITY', int, 85),
+        'no_compression': ('NO_COMPRESSION', lambda v: bool(int(v)), False),
+        'max_pages': ('MANGA_MAX_PAGES', int, 200),
+    }
+
+    def __init__(self, **static):
+        self.__dict__.update(static)
+
+    def __getattr__(self, name: str):
+        if name not in self._fields:
+            raise AttributeError(name)
+        value = _read_setting(self._fields, name)
+        setattr(self, name, value)
+        return value
 
 # Lightweight config namespace for optional manga/scribd components
-config = SimpleNamespace(
-    # Playwright / scraping
-    headless=(os.getenv('SCRIBD_HEADLESS', '1').strip() not in {'0', 'false', 'False'}),
-    device_scale_factor=int(os.getenv('DEVICE_SCALE_FACTOR', '2') or '2'),
-    sel_timeout_ms=int(os.getenv('SEL_TIMEOUT_MS', '30000') or '30000'),
-    nav_timeout_ms=int(os.getenv('NAV_TIMEOUT_MS', '60000') or '60000'),
-    scroll_timeout=int(os.getenv('SCROLL_TIMEOUT', '180') or '180'),
-    # HTTP
-    http_timeout=int(os.getenv('HTTP_TIMEOUT', '60') or '60'),
-    download_batch_size=int(os.getenv('DOWNLOAD_BATCH_SIZE', '5') or '5'),
-    # PDF
-    pdf_quality=int(os.getenv('PDF_QUALITY', '85') or '85'),
-    no_compression=bool(int(os.getenv('NO_COMPRESSION', '0') or '0')),
-    max_pages=int(os.getenv('MANGA_MAX_PAGES', '200') or '200'),
+config = _LazyConfig(
     # Paths
     temp_dir=str(TEMP_DIR),
 )
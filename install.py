@@ -3,7 +3,6 @@
 Installation and migration script for PDF Bot
 Migrates from SQLite/JSON to MongoDB
 """
-import os
 import sys
 import json
 import sqlite3
@@ -11,6 +10,12 @@ import asyncio
 from pathlib import Path
 from datetime import datetime
 import motor.motor_asyncio
+from pymongo import UpdateOne
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json works too
+    orjson = None
 
 # Color codes for terminal output
 GREEN = '\033[92m'
@@ -19,6 +24,9 @@ RED = '\033[91m'
 BLUE = '\033[94m'
 RESET = '\033[0m'
 
+# Upserts per bulk_write round-trip during migration
+BULK_CHUNK = 1000
+
 def print_colored(text, color=RESET):
     try:
         print(f"{color}{text}{RESET}")
@@ -45,7 +53,11 @@ async def check_mongodb():
         mongo_url = "mongodb://localhost:27017"
     
     try:
-        client = motor.motor_asyncio.AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        client = motor.motor_asyncio.AsyncIOMotorClient(
+            mongo_url,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=50,
+        )
         await client.server_info()
         print_colored("✅ MongoDB connection successful!", GREEN)
         return client
@@ -53,74 +65,108 @@ async def check_mongodb():
         print_colored(f"❌ MongoDB connection failed: {e}", RED)
         return None
 
+def load_json_file(path):
+    """Load a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def migration_update(fields, now):
+    """Upsert document that stamps migrated_at only on first insert"""
+    # Re-running the installer then leaves already-migrated, unchanged
+    # documents untouched instead of rewriting every row
+    update = {'$setOnInsert': {'migrated_at': now}}
+    if fields:
+        update['$set'] = fields
+    return update
+
+async def bulk_upsert(collection, ops):
+    """Submit upserts in unordered chunks of BULK_CHUNK"""
+    for i in range(0, len(ops), BULK_CHUNK):
+        await collection.bulk_write(ops[i:i + BULK_CHUNK], ordered=False)
+
+async def create_migration_indexes(db):
+    """Create the user_id indexes the upserts filter on (same as the bot's)"""
+    for collection in (db.users, db.user_settings):
+        try:
+            await collection.create_index('user_id', unique=True)
+        except Exception as e:
+            print_colored(f"⚠️ Could not create index on {collection.name}.user_id: {e}", YELLOW)
+
+def open_sqlite(sqlite_file):
+    """Open a read-only connection to the legacy SQLite database"""
+    # Read-only: migrating must not modify the legacy file. Reads run in
+    # worker threads (asyncio.to_thread), not the opening one; each
+    # migration gets its own connection so no two threads share one
+    uri = f"{Path(sqlite_file).resolve().as_uri()}?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
 async def migrate_users(db, sqlite_file):
     """Migrate users from SQLite to MongoDB"""
-    if not sqlite_file.exists():
-        print_colored("⚠️ No SQLite database found, skipping users migration", YELLOW)
-        return 0
-    
     print_colored("\n📦 Migrating users...", YELLOW)
     
-    conn = sqlite3.connect(sqlite_file)
+    conn = open_sqlite(sqlite_file)
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT id FROM users")
-        users = cursor.fetchall()
+        await asyncio.to_thread(cursor.execute, "SELECT id FROM users")
+        now = datetime.now()
+        count = 0
         
-        if users:
-            for user_id, in users:
-                await db.users.update_one(
+        # Stream rows in chunks so memory stays O(chunk) on large tables;
+        # reads happen off the event loop so Mongo writes keep flowing
+        while True:
+            rows = await asyncio.to_thread(cursor.fetchmany, BULK_CHUNK)
+            if not rows:
+                break
+            await bulk_upsert(db.users, [
+                UpdateOne(
                     {'user_id': user_id},
-                    {
-                        '$set': {
-                            'user_id': user_id,
-                            'migrated_at': datetime.now()
-                        }
-                    },
+                    migration_update(None, now),
                     upsert=True
                 )
-            
-            print_colored(f"✅ Migrated {len(users)} users", GREEN)
-            return len(users)
+                for user_id, in rows
+            ])
+            count += len(rows)
+        
+        if not count:
+            print_colored("⚠️ No users to migrate", YELLOW)
+            return 0
+        
+        print_colored(f"✅ Migrated {count} users", GREEN)
+        return count
     except Exception as e:
         print_colored(f"⚠️ Error migrating users: {e}", YELLOW)
         return 0
     finally:
+        cursor.close()
         conn.close()
 
 async def migrate_stats(db, sqlite_file):
     """Migrate statistics from SQLite to MongoDB"""
-    if not sqlite_file.exists():
-        print_colored("⚠️ No SQLite database found, skipping stats migration", YELLOW)
-        return
-    
     print_colored("\n📊 Migrating statistics...", YELLOW)
     
-    conn = sqlite3.connect(sqlite_file)
+    conn = open_sqlite(sqlite_file)
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT files, storage_bytes FROM stats WHERE id=1")
-        stats = cursor.fetchone()
+        await asyncio.to_thread(cursor.execute, "SELECT files, storage_bytes FROM stats WHERE id=1")
+        stats = await asyncio.to_thread(cursor.fetchone)
         
         if stats:
             files, storage_bytes = stats
             await db.stats.update_one(
                 {'_id': 'global'},
-                {
-                    '$set': {
-                        'files': files,
-                        'storage_bytes': storage_bytes,
-                        'migrated_at': datetime.now()
-                    }
-                },
+                migration_update({'files': files, 'storage_bytes': storage_bytes}, datetime.now()),
                 upsert=True
             )
             print_colored(f"✅ Migrated stats: {files} files, {storage_bytes} bytes", GREEN)
     except Exception as e:
         print_colored(f"⚠️ Error migrating stats: {e}", YELLOW)
     finally:
+        cursor.close()
         conn.close()
 
 async def migrate_json_settings(db):
@@ -131,20 +177,19 @@ async def migrate_json_settings(db):
         print_colored("\n⚙️ Migrating PDF settings...", YELLOW)
         
         try:
-            with open(pdf_settings_file, "r", encoding="utf-8") as f:
-                settings = json.load(f)
+            settings = load_json_file(pdf_settings_file)
             
-            for user_id, user_settings in settings.items():
-                await db.user_settings.update_one(
+            now = datetime.now()
+            ops = [
+                UpdateOne(
                     {'user_id': int(user_id)},
-                    {
-                        '$set': {
-                            **user_settings,
-                            'migrated_at': datetime.now()
-                        }
-                    },
+                    migration_update(user_settings, now),
                     upsert=True
                 )
+                for user_id, user_settings in settings.items()
+            ]
+            if ops:
+                await bulk_upsert(db.user_settings, ops)
             
             print_colored(f"✅ Migrated settings for {len(settings)} users", GREEN)
         except Exception as e:
@@ -156,19 +201,13 @@ async def migrate_json_settings(db):
         print_colored("\n📢 Migrating force join channels...", YELLOW)
         
         try:
-            with open(force_join_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = load_json_file(force_join_file)
             
             channels = data.get('channels', [])
             if channels:
                 await db.config.update_one(
                     {'_id': 'force_join'},
-                    {
-                        '$set': {
-                            'channels': channels,
-                            'migrated_at': datetime.now()
-                        }
-                    },
+                    migration_update({'channels': channels}, datetime.now()),
                     upsert=True
                 )
                 print_colored(f"✅ Migrated {len(channels)} force join channels", GREEN)
@@ -181,20 +220,19 @@ async def migrate_json_settings(db):
         print_colored("\n👤 Migrating usernames...", YELLOW)
         
         try:
-            with open(usernames_file, "r", encoding="utf-8") as f:
-                usernames = json.load(f)
+            usernames = load_json_file(usernames_file)
             
-            for user_id, username in usernames.items():
-                await db.user_settings.update_one(
+            now = datetime.now()
+            ops = [
+                UpdateOne(
                     {'user_id': int(user_id)},
-                    {
-                        '$set': {
-                            'username': username,
-                            'migrated_at': datetime.now()
-                        }
-                    },
+                    migration_update({'username': username}, now),
                     upsert=True
                 )
+                for user_id, username in usernames.items()
+            ]
+            if ops:
+                await bulk_upsert(db.user_settings, ops)
             
             print_colored(f"✅ Migrated {len(usernames)} usernames", GREEN)
         except Exception as e:
@@ -245,6 +283,7 @@ MONGODB_URL={mongo_url}
 MAX_FILE_SIZE=2147483648
 MAX_BATCH_FILES=24
 AUTO_DELETE_DELAY=300
+MAX_CONCURRENT_TRANSMISSIONS=8
 """
     
     with open(env_path, "w", encoding="utf-8") as f:
@@ -252,86 +291,37 @@ AUTO_DELETE_DELAY=300
     
     print_colored("✅ Configuration file created", GREEN)
 
-def create_config_py():
-    """Create config.py from environment variables"""
-    print_colored("\n📝 Creating config.py...", YELLOW)
-    
-    config_content = '''"""
-Bot configuration
-"""
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Telegram API
-API_ID = int(os.getenv('API_ID', 0))
-API_HASH = os.getenv('API_HASH', '')
-BOT_TOKEN = os.getenv('BOT_TOKEN', '')
+async def run_command(*cmd) -> int:
+    """Run a command, streaming its output, and return the exit code"""
+    proc = await asyncio.create_subprocess_exec(*cmd)
+    return await proc.wait()
 
-# Admin configuration
-ADMIN_IDS = os.getenv('ADMIN_IDS', '')
-
-# MongoDB
-MONGODB_URL = os.getenv('MONGODB_URL', 'mongodb://localhost:27017')
-
-# Bot settings
-MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 2147483648))  # 2GB
-MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', 24))
-AUTO_DELETE_DELAY = int(os.getenv('AUTO_DELETE_DELAY', 300))  # 5 minutes
-
-# Paths
-BASE_DIR = Path(__file__).parent
-TEMP_DIR = BASE_DIR / "temp_files"
-BANNERS_DIR = BASE_DIR / "banners"
-DATA_DIR = BASE_DIR / "data"
-
-# Messages
-MESSAGES = {
-    'start': """👋 Welcome to Advanced PDF Tools Bot!
-
-Send me a PDF and I'll help you clean, edit, add banner and lock it.
-
-📋 Features:
-• Rename file (clean usernames)
-• Unlock protected PDFs
-• Remove pages
-• Add your default banner
-• Lock with your default password
-• Batch processing
-
-🎯 Commands:
-/start - Show this message
-/batch - Enable sequence mode
-/process - Process sequence files
-/setbanner - Set your default banner
-/setpassword - Set default lock password
-/status - Check bot status
-
-📤 Just send me a PDF to get started!""",
-    'not_pdf': "❌ This is not a PDF file!",
-    'file_too_big': "❌ File is too large!",
-    'processing': "⏳ Processing...",
-    'success_unlock': "✅ PDF unlocked successfully!",
-    'success_pages': "✅ Pages removed successfully!",
-    'error': "❌ Error during processing"
-}
-'''
+async def install_dependencies():
+    """Install Python packages and the Playwright browser"""
+    pip_cmd = (sys.executable, "-m", "pip", "install", "-r", "requirements.txt")
+    browser_cmd = (sys.executable, "-m", "playwright", "install", "chromium")
     
-    with open("config.py", "w", encoding="utf-8") as f:
-        f.write(config_content)
+    # Browsers only after pip: installing them while pip upgrades playwright
+    # would fetch the builds the old version expects
+    print_colored("\n📦 Installing Python dependencies...", YELLOW)
+    pip_rc = await run_command(*pip_cmd)
+    print_colored("\n🌐 Installing Playwright browsers...", YELLOW)
+    browser_rc = await run_command(*browser_cmd)
     
-    print_colored("✅ config.py created", GREEN)
+    if pip_rc != 0:
+        print_colored(f"❌ pip install failed (exit code {pip_rc})", RED)
+    if browser_rc != 0:
+        print_colored(f"❌ Playwright browser install failed (exit code {browser_rc})", RED)
+    if pip_rc != 0 or browser_rc != 0:
+        sys.exit(1)
 
 async def main():
     """Main installation function"""
     print_header()
     
     # Check Python version
-    if sys.version_info < (3, 8):
-        print_colored("❌ Python 3.8+ is required", RED)
+    if sys.version_info < (3, 10):
+        print_colored("❌ Python 3.10+ is required", RED)
         sys.exit(1)
     
     print_colored("✅ Python version OK", GREEN)
@@ -355,37 +345,37 @@ async def main():
         print_colored("Installation instructions: https://docs.mongodb.com/manual/installation/", YELLOW)
         sys.exit(1)
     
-    db = client.pdfbot_database
-    
-    # Migrate data
-    sqlite_file = Path("bot_data.sqlite3")
-    
-    if sqlite_file.exists() or Path("pdf_settings.json").exists() or Path("usernames.json").exists():
-        print_colored("\n🔄 Starting data migration...", BLUE)
+    try:
+        db = client.pdfbot_database
+        
+        # Migrate data
+        sqlite_file = Path("bot_data.sqlite3")
         
-        # Migrate users and stats from SQLite
-        if sqlite_file.exists():
-            await migrate_users(db, sqlite_file)
-            await migrate_stats(db, sqlite_file)
+        if sqlite_file.exists() or Path("pdf_settings.json").exists() or Path("usernames.json").exists():
+            print_colored("\n🔄 Starting data migration...", BLUE)
         
-        # Migrate JSON settings
-        await migrate_json_settings(db)
+            # Index first so each upsert is an index lookup, not a collection scan
+            await create_migration_indexes(db)
         
-        print_colored("\n✅ Data migration completed!", GREEN)
-    else:
-        print_colored("\n⚠️ No existing data found to migrate", YELLOW)
+            # The migrations touch disjoint collections, so overlap their I/O
+            migrations = [migrate_json_settings(db)]
+            if sqlite_file.exists():
+                migrations += [migrate_users(db, sqlite_file), migrate_stats(db, sqlite_file)]
+            else:
+                print_colored("⚠️ No SQLite database found, skipping users and stats migration", YELLOW)
+            await asyncio.gather(*migrations)
+        
+            print_colored("\n✅ Data migration completed!", GREEN)
+        else:
+            print_colored("\n⚠️ No existing data found to migrate", YELLOW)
+    finally:
+        client.close()
     
     # Create configuration files
     create_env_file()
-    create_config_py()
     
-    # Install dependencies
-    print_colored("\n📦 Installing Python dependencies...", YELLOW)
-    os.system("pip install -r requirements.txt")
-    
-    # Install Playwright browsers
-    print_colored("\n🌐 Installing Playwright browsers...", YELLOW)
-    os.system("python -m playwright install chromium")
+    # Install dependencies and Playwright browsers
+    await install_dependencies()
     
     print_colored("\n" + "="*50, GREEN)
     print_colored("✅ Installation completed successfully!", GREEN)
@@ -1,89 +1,250 @@
 """
 Admin functions and Force Join management for PDF Bot
 """
-import re
+import time
+import asyncio
 import logging
-from typing import List
-from functools import wraps
+from typing import Dict, List, Optional, Set, Tuple
+from functools import lru_cache, wraps
 
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from pyrogram.errors import UserNotParticipant, ChatAdminRequired, UsernameNotOccupied
+from pyrogram.errors import (
+    UserNotParticipant, ChatAdminRequired, UsernameNotOccupied, FloodWait,
+    UserIsBlocked, InputUserDeactivated, PeerIdInvalid, MessageNotModified,
+)
 from pyrogram.enums import ChatMemberStatus, ParseMode
 
 from utils.database import db
+from utils.helpers import format_bytes
 from config import ADMIN_IDS
 
 logger = logging.getLogger(__name__)
 
+# Strong references to fire-and-forget tasks: the loop only holds tasks
+# weakly, so an unreferenced one can be collected before it finishes
+_background_tasks: Set[asyncio.Task] = set()
+
+def _spawn(coro) -> asyncio.Task:
+    """Run coro in the background, logging a failure instead of losing it"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+
+    def _done(t: asyncio.Task):
+        _background_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error(f"Background task failed: {t.exception()}")
+    task.add_done_callback(_done)
+    return task
+
+# Concurrent sends during /broadcast, paced under Telegram's ~30 msg/s bot limit
+BROADCAST_CONCURRENCY = 20
+BROADCAST_RATE = 25
+BROADCAST_MAX_RETRIES = 3
+
+# Broadcasts run one at a time; depth counts the running one plus queued
+_broadcast_lock: Optional[asyncio.Lock] = None
+_broadcast_depth = 0
+
+def _get_broadcast_lock() -> asyncio.Lock:
+    # Created lazily so it binds to the running event loop
+    global _broadcast_lock
+    if _broadcast_lock is None:
+        _broadcast_lock = asyncio.Lock()
+    return _broadcast_lock
+
+class _TokenBucket:
+    """Async token bucket; pause() stalls every caller after a FloodWait"""
+    
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.resume_at = 0.0
+    
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+    
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.resume_at:
+                await asyncio.sleep(self.resume_at - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def _edit_quietly(msg: Message, text: str):
+    """Progress edit that never raises into the caller"""
+    try:
+        await msg.edit_text(text)
+    except MessageNotModified:
+        pass
+    except Exception as e:
+        logger.debug(f"Progress edit failed: {e}")
+
+# Forced-channel list cache; /addfsub and /delfsub invalidate it
+CHANNEL_CACHE_TTL = 60
+_channel_cache = {'ts': 0.0, 'val': None}
+
+async def _cached_channels() -> List[str]:
+    """Forced channels from an in-process cache, refreshed every CHANNEL_CACHE_TTL"""
+    now = time.monotonic()
+    if _channel_cache['val'] is not None and now - _channel_cache['ts'] < CHANNEL_CACHE_TTL:
+        return _channel_cache['val']
+    channels = await db.get_forced_channels()
+    _channel_cache.update(ts=now, val=channels)
+    return channels
+
+def _invalidate_channel_cache():
+    _channel_cache['val'] = None
+
+def _set_channel_cache(channels: List[str]):
+    _channel_cache.update(ts=time.monotonic(), val=channels)
+
+def _persist_channels(coro):
+    """Run a forced-channel DB write in the background
+    
+    The admin commands reply optimistically from the cache. If the write
+    fails, the cache is dropped so the next read reloads the stored list,
+    and a crash before the write lands loses that one change.
+    """
+    def _done(task: asyncio.Task):
+        # set_forced_channels reports failure as False rather than raising
+        if task.cancelled() or task.exception() is not None or task.result() is False:
+            error = None if task.cancelled() else task.exception()
+            logger.error(f"Forced-channel update failed: {error}")
+            _invalidate_channel_cache()
+    # Referenced like _spawn's tasks, but with its own failure handling
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(_done)
+
+# Per-(channel, user) membership answers: (expires_at, is_member).
+# Only definitive Telegram replies are stored, never lookup errors.
+MEMBERSHIP_CACHE_TTL = 120
+MEMBERSHIP_CACHE_MAX = 100_000
+_membership_cache: Dict[Tuple[str, int], Tuple[float, bool]] = {}
+
+_VALID_MEMBER_STATUSES = frozenset({
+    ChatMemberStatus.MEMBER,
+    ChatMemberStatus.ADMINISTRATOR,
+    ChatMemberStatus.OWNER,
+})
+
 # Parse admin IDs from config
-ADMIN_ID_LIST = [int(x) for x in str(ADMIN_IDS).split(',') if x.strip()] if ADMIN_IDS else []
+ADMIN_ID_SET = {int(x) for x in str(ADMIN_IDS).split(',') if x.strip()} if ADMIN_IDS else set()
 
 def is_admin(user_id: int) -> bool:
     """Check if user is admin"""
-    return user_id in ADMIN_ID_LIST
+    return user_id in ADMIN_ID_SET
+
+# Non-admins get the "Admins only" reply at most once per REJECT_REPLY_TTL
+REJECT_REPLY_TTL = 60
+REJECT_REPLY_MAX = 10_000
+_rejected_recent: Dict[int, float] = {}
 
 def admin_only(func):
     """Decorator to restrict access to admins only"""
     @wraps(func)
     async def wrapper(client, message, *args, **kwargs):
-        if not is_admin(message.from_user.id):
-            await message.reply_text("❌ Admins only.", quote=True)
+        user_id = message.from_user.id
+        if not is_admin(user_id):
+            now = time.monotonic()
+            if _rejected_recent.get(user_id, 0.0) > now:
+                return
+            if len(_rejected_recent) >= REJECT_REPLY_MAX:
+                _rejected_recent.clear()
+            _rejected_recent[user_id] = now + REJECT_REPLY_TTL
+            # Don't hold the handler on the reply round-trip
+            _spawn(message.reply_text("❌ Admins only.", quote=True))
             return
         return await func(client, message, *args, **kwargs)
     return wrapper
 
-async def is_user_in_channel(client: Client, user_id: int) -> bool:
-    """Check if user is member of all required channels"""
+async def is_user_in_channel(client: Client, user_id: int, fresh: bool = False) -> bool:
+    """Check if user is member of all required channels
+    
+    Definitive answers are cached per (channel, user) for
+    MEMBERSHIP_CACHE_TTL; pass fresh=True to re-query Telegram.
+    """
     # Admins bypass
     if is_admin(user_id):
         return True
     
-    # Get channels from database
-    channels = await db.get_forced_channels()
+    # Get channels (cached)
+    channels = await _cached_channels()
     if not channels:
         return True
     
-    valid_statuses = [
-        ChatMemberStatus.MEMBER,
-        ChatMemberStatus.ADMINISTRATOR,
-        ChatMemberStatus.OWNER,
-    ]
-    
-    # Check membership in all channels
+    now = time.monotonic()
+    to_check = []
     for channel in channels:
-        try:
-            member = await client.get_chat_member(channel, user_id)
-            if member.status not in valid_statuses:
-                return False
-        except UserNotParticipant:
+        cached = None if fresh else _membership_cache.get((channel, user_id))
+        if cached is None or cached[0] <= now:
+            to_check.append(channel)
+        elif not cached[1]:
             return False
-        except ChatAdminRequired:
-            # Bot not admin in channel, allow access
-            logger.warning(f"Bot not admin in channel: @{channel}")
-            continue
-        except UsernameNotOccupied:
-            # Channel doesn't exist
-            logger.error(f"Channel not found: @{channel}")
-            continue
+    if not to_check:
+        return True
+    
+    async def check(channel: str):
+        try:
+            return channel, await client.get_chat_member(channel, user_id)
         except Exception as e:
-            logger.error(f"Error checking membership for @{channel}: {e}")
-            continue
+            return channel, e
+    
+    if len(_membership_cache) >= MEMBERSHIP_CACHE_MAX:
+        _membership_cache.clear()
+    expires = now + MEMBERSHIP_CACHE_TTL
+    
+    # Query the uncached channels concurrently and stop at the first
+    # definitive "not a member" without waiting for the others
+    tasks = [asyncio.create_task(check(channel)) for channel in to_check]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            channel, res = await next_done
+            if isinstance(res, UserNotParticipant):
+                _membership_cache[(channel, user_id)] = (expires, False)
+                return False
+            if isinstance(res, ChatAdminRequired):
+                # Bot not admin in channel, allow access
+                logger.warning(f"Bot not admin in channel: @{channel}")
+                continue
+            if isinstance(res, UsernameNotOccupied):
+                # Channel doesn't exist
+                logger.error(f"Channel not found: @{channel}")
+                continue
+            if isinstance(res, Exception):
+                logger.error(f"Error checking membership for @{channel}: {res}")
+                continue
+            ok = res.status in _VALID_MEMBER_STATUSES
+            _membership_cache[(channel, user_id)] = (expires, ok)
+            if not ok:
+                return False
+    finally:
+        for task in tasks:
+            task.cancel()
     
     return True
 
-async def send_force_join_message(client: Client, message: Message):
-    """Send force join message with channel buttons"""
-    channels = await db.get_forced_channels()
-    if not channels:
-        return
-    
+# Constant callback payload, so a plain equality check instead of a regex
+_CHECK_JOINED = filters.create(lambda _, __, query: query.data == "check_joined")
+
+@lru_cache(maxsize=8)
+def _build_force_join(channels: Tuple[str, ...]) -> Tuple[str, InlineKeyboardMarkup]:
+    """Render the force-join text and keyboard for a channel list"""
     # Build channel buttons
-    buttons = []
-    for channel in channels:
-        buttons.append([
-            InlineKeyboardButton(f"📢 Join @{channel}", url=f"https://t.me/{channel}")
-        ])
+    buttons = [
+        [InlineKeyboardButton(f"📢 Join @{channel}", url=f"https://t.me/{channel}")]
+        for channel in channels
+    ]
     
     # Add verification button
     buttons.append([
@@ -91,30 +252,37 @@ async def send_force_join_message(client: Client, message: Message):
     ])
     
     # Build message text
-    text = (
-        "🚫 **Access Denied!**\n\n"
-        "To use this bot, you must first join our channel(s):\n"
-    )
-    for channel in channels:
-        text += f"👉 @{channel}\n"
-    text += (
+    parts = ["🚫 **Access Denied!**\n\nTo use this bot, you must first join our channel(s):"]
+    parts.extend(f"👉 @{channel}" for channel in channels)
+    parts.append(
         "\n✅ Click the button(s) above to join.\n"
         "Once done, tap **I have joined** to continue.\n\n"
         "_Thank you for your support!_ 💙"
     )
+    return "\n".join(parts), InlineKeyboardMarkup(buttons)
+
+async def send_force_join_message(client: Client, message: Message):
+    """Send force join message with channel buttons"""
+    channels = await _cached_channels()
+    if not channels:
+        return
+    
+    # Rendered once per distinct channel list
+    text, markup = _build_force_join(tuple(channels))
     
     await message.reply_text(
         text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=markup,
         parse_mode=ParseMode.MARKDOWN
     )
 
-@Client.on_callback_query(filters.regex("^check_joined$"))
+@Client.on_callback_query(_CHECK_JOINED)
 async def check_joined_handler(client: Client, query: CallbackQuery):
     """Handle 'I have joined' button click"""
     user_id = query.from_user.id
     
-    is_member = await is_user_in_channel(client, user_id)
+    # The user says they just joined, so skip any cached "not a member"
+    is_member = await is_user_in_channel(client, user_id, fresh=True)
     
     if is_member:
         await query.answer("✅ Thank you! You can now use the bot.", show_alert=True)
@@ -132,8 +300,9 @@ async def check_joined_handler(client: Client, query: CallbackQuery):
 @admin_only
 async def addfsub_handler(client: Client, message: Message):
     """Add forced subscription channels"""
-    args = message.text.split(maxsplit=1)
-    if len(args) < 2:
+    # filters.command already tokenised the arguments
+    args = message.command[1:]
+    if not args:
         await message.reply_text(
             "Usage:\n`/addfsub @channel1 @channel2 ...`",
             quote=True,
@@ -142,11 +311,15 @@ async def addfsub_handler(client: Client, message: Message):
         return
     
     # Parse channel names
-    raw = re.split(r"[,\s]+", args[1].strip())
-    channels = [x for x in (s.lstrip("@").lstrip("#") for s in raw) if x]
+    # Commas or any whitespace separate names; str.split() collapses runs
+    raw = " ".join(args).replace(",", " ").split()
+    channels = list(dict.fromkeys(x for x in (s.lstrip("@#") for s in raw) if x))
     
-    # Add to database
-    new_list = await db.add_forced_channels(channels)
+    # Apply to the cache now and persist in the background
+    current = await _cached_channels()
+    new_list = list(dict.fromkeys([*current, *channels]))
+    _set_channel_cache(new_list)
+    _persist_channels(db.add_forced_channels(channels))
     
     await message.reply_text(
         "✅ Forced-sub channels updated:\n" + 
@@ -158,20 +331,25 @@ async def addfsub_handler(client: Client, message: Message):
 @admin_only
 async def delfsub_handler(client: Client, message: Message):
     """Remove forced subscription channels"""
-    args = message.text.split(maxsplit=1)
+    args = message.command[1:]
     
-    if len(args) < 2:
+    if not args:
         # Clear all channels
-        await db.set_forced_channels([])
+        _set_channel_cache([])
+        _persist_channels(db.set_forced_channels([]))
         await message.reply_text("✅ All forced-sub channels removed.", quote=True)
         return
     
     # Parse channel names to remove
-    raw = re.split(r"[,\s]+", args[1].strip())
-    channels = [x for x in (s.lstrip("@").lstrip("#") for s in raw) if x]
+    # Commas or any whitespace separate names; str.split() collapses runs
+    raw = " ".join(args).replace(",", " ").split()
+    channels = list(dict.fromkeys(x for x in (s.lstrip("@#") for s in raw) if x))
     
-    # Remove from database
-    new_list = await db.remove_forced_channels(channels)
+    # Apply to the cache now and persist in the background
+    removed = set(channels)
+    new_list = [c for c in await _cached_channels() if c not in removed]
+    _set_channel_cache(new_list)
+    _persist_channels(db.remove_forced_channels(channels))
     
     if new_list:
         await message.reply_text(
@@ -186,7 +364,7 @@ async def delfsub_handler(client: Client, message: Message):
 @admin_only
 async def channels_handler(client: Client, message: Message):
     """List all forced subscription channels"""
-    channels = await db.get_forced_channels()
+    channels = await _cached_channels()
     
     if not channels:
         await message.reply_text("ℹ️ No forced-sub channels configured.", quote=True)
@@ -204,8 +382,7 @@ async def channels_handler(client: Client, message: Message):
 @admin_only
 async def broadcast_handler(client: Client, message: Message):
     """Broadcast message to all users"""
-    args = message.text.split(maxsplit=1)
-    if len(args) < 2:
+    if len(message.command) < 2:
         await message.reply_text(
             "Usage:\n`/broadcast Your message here`",
             quote=True,
@@ -213,39 +390,120 @@ async def broadcast_handler(client: Client, message: Message):
         )
         return
     
-    broadcast_text = args[1]
-    
-    # Get all users
-    users = await db.get_all_users()
+    # Raw remainder rather than message.command, to keep line breaks
+    broadcast_text = message.text.split(maxsplit=1)[1]
     
-    # Send broadcast
-    success = 0
-    failed = 0
-    
-    status = await message.reply_text(f"📢 Broadcasting to {len(users)} users...")
-    
-    for user_id in users:
-        try:
-            await client.send_message(user_id, broadcast_text)
-            success += 1
-        except Exception as e:
-            logger.error(f"Broadcast failed for {user_id}: {e}")
-            failed += 1
+    global _broadcast_depth
+    _broadcast_depth += 1
+    try:
+        # Persist the broadcast and its recipients first so a restart can
+        # resume it without re-sending to users already reached
+        broadcast_id = await db.create_broadcast(broadcast_text, message.chat.id)
         
-        # Update status every 10 users
-        if (success + failed) % 10 == 0:
-            await status.edit_text(
-                f"📢 Broadcasting...\n"
-                f"Progress: {success + failed}/{len(users)}\n"
-                f"Success: {success}\n"
-                f"Failed: {failed}"
+        # One broadcast at a time; concurrent ones would share the same
+        # per-bot rate limit and just trip FloodWait for each other
+        if _broadcast_depth > 1:
+            await message.reply_text(
+                f"⏳ Queued (#{_broadcast_depth}). Will start after the current broadcast finishes.",
+                quote=True
             )
+        async with _get_broadcast_lock():
+            total = await db.count_pending_targets(broadcast_id)
+            status = await message.reply_text(f"📢 Broadcasting to {total} users...")
+            await _run_broadcast(client, broadcast_id, broadcast_text, status, total)
+    finally:
+        _broadcast_depth -= 1
+
+async def resume_broadcasts(client: Client):
+    """Finish broadcasts that were interrupted by a restart"""
+    for doc in await db.get_unfinished_broadcasts():
+        broadcast_id = doc['_id']
+        total = await db.count_pending_targets(broadcast_id)
+        logger.info(f"Resuming broadcast {broadcast_id} ({total} pending)")
+        try:
+            async with _get_broadcast_lock():
+                status = await client.send_message(doc['chat_id'], f"🔁 Resuming broadcast to {total} remaining users...")
+                await _run_broadcast(client, broadcast_id, doc['text'], status, total)
+        except Exception as e:
+            logger.error(f"Resuming broadcast {broadcast_id} failed: {e}")
+
+async def _run_broadcast(client: Client, broadcast_id, broadcast_text: str, status: Message, total: int):
+    """Deliver a persisted broadcast to its pending targets"""
+    success = 0
+    failed = 0
     
+    bucket = _TokenBucket(BROADCAST_RATE)
+    # Bounded so the cursor only reads ahead of the workers by a little
+    queue: asyncio.Queue = asyncio.Queue(maxsize=BROADCAST_CONCURRENCY * 2)
+    
+    async def send(user_id: int):
+        nonlocal success, failed
+        for _ in range(BROADCAST_MAX_RETRIES):
+            await bucket.acquire()
+            try:
+                await client.send_message(user_id, broadcast_text)
+                success += 1
+                await db.set_target_status(broadcast_id, user_id, 'sent')
+                return
+            except FloodWait as e:
+                # The limit is per bot, so hold every sender, then retry
+                logger.warning(f"Broadcast FloodWait {e.value}s at user {user_id}")
+                bucket.pause(e.value + 0.1)
+            except (UserIsBlocked, InputUserDeactivated, PeerIdInvalid) as e:
+                # Permanent; skip this user in future broadcasts
+                logger.info(f"Broadcast unreachable user {user_id}: {e}")
+                await db.mark_user_blocked(user_id)
+                break
+            except Exception as e:
+                logger.error(f"Broadcast failed for {user_id}: {e}")
+                break
+        failed += 1
+        await db.set_target_status(broadcast_id, user_id, 'failed')
+    
+    async def worker():
+        while True:
+            user_id = await queue.get()
+            if user_id is None:
+                return
+            await send(user_id)
+    
+    workers = [asyncio.create_task(worker()) for _ in range(BROADCAST_CONCURRENCY)]
+    
+    reported = 0
+    edit_task = None
+    try:
+        async for doc in db.get_pending_targets_cursor(broadcast_id):
+            await queue.put(doc['user_id'])
+            
+            # Update status every 100 users, in the background so the send
+            # loop never waits on it; at most one edit is in flight
+            done = success + failed
+            if done - reported >= 100 and (edit_task is None or edit_task.done()):
+                reported = done - done % 100
+                edit_task = asyncio.create_task(_edit_quietly(
+                    status,
+                    f"📢 Broadcasting...\n"
+                    f"Progress: {done}/{total}\n"
+                    f"Success: {success}\n"
+                    f"Failed: {failed}"
+                ))
+    finally:
+        # One sentinel per worker, then let them drain the queue
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        if edit_task is not None:
+            await edit_task
+    
+    # Totals across every run of this broadcast, including resumed ones
+    counts = await db.finish_broadcast(broadcast_id)
+    sent = counts.get('sent', 0)
+    not_sent = counts.get('failed', 0)
     await status.edit_text(
         f"✅ Broadcast complete!\n"
-        f"Total: {len(users)}\n"
-        f"Success: {success}\n"
-        f"Failed: {failed}"
+        f"Total: {sent + not_sent}\n"
+        f"Success: {sent}\n"
+        f"Failed: {not_sent}"
     )
 
 @Client.on_message(filters.command("stats") & filters.private)
@@ -270,8 +528,7 @@ async def stats_handler(client: Client, message: Message):
 @admin_only
 async def setadmin_handler(client: Client, message: Message):
     """Add a new admin"""
-    args = message.text.split(maxsplit=1)
-    if len(args) < 2:
+    if len(message.command) < 2:
         await message.reply_text(
             "Usage:\n`/setadmin USER_ID`",
             quote=True,
@@ -280,13 +537,13 @@ async def setadmin_handler(client: Client, message: Message):
         return
     
     try:
-        new_admin_id = int(args[1])
+        new_admin_id = int(message.command[1])
     except ValueError:
         await message.reply_text("❌ Invalid user ID", quote=True)
         return
     
-    if new_admin_id not in ADMIN_ID_LIST:
-        ADMIN_ID_LIST.append(new_admin_id)
+    if new_admin_id not in ADMIN_ID_SET:
+        ADMIN_ID_SET.add(new_admin_id)
         await message.reply_text(f"✅ User {new_admin_id} is now an admin", quote=True)
     else:
         await message.reply_text("ℹ️ User is already an admin", quote=True)
@@ -295,8 +552,7 @@ async def setadmin_handler(client: Client, message: Message):
 @admin_only
 async def deladmin_handler(client: Client, message: Message):
     """Remove an admin"""
-    args = message.text.split(maxsplit=1)
-    if len(args) < 2:
+    if len(message.command) < 2:
         await message.reply_text(
             "Usage:\n`/deladmin USER_ID`",
             quote=True,
@@ -305,13 +561,13 @@ async def deladmin_handler(client: Client, message: Message):
         return
     
     try:
-        admin_id = int(args[1])
+        admin_id = int(message.command[1])
     except ValueError:
         await message.reply_text("❌ Invalid user ID", quote=True)
         return
     
-    if admin_id in ADMIN_ID_LIST:
-        ADMIN_ID_LIST.remove(admin_id)
+    if admin_id in ADMIN_ID_SET:
+        ADMIN_ID_SET.discard(admin_id)
         await message.reply_text(f"✅ User {admin_id} is no longer an admin", quote=True)
     else:
         await message.reply_text("ℹ️ User is not an admin", quote=True)
@@ -320,26 +576,19 @@ async def deladmin_handler(client: Client, message: Message):
 @admin_only
 async def admins_handler(client: Client, message: Message):
     """List all admins"""
-    if not ADMIN_ID_LIST:
+    if not ADMIN_ID_SET:
         await message.reply_text("ℹ️ No admins configured", quote=True)
         return
     
-    text = "👮 **Bot Admins:**\n\n"
-    for admin_id in ADMIN_ID_LIST:
-        try:
-            user = await client.get_users(admin_id)
-            text += f"• {user.mention} ({admin_id})\n"
-        except Exception:
-            text += f"• User {admin_id}\n"
+    admin_ids = sorted(ADMIN_ID_SET)
+    users = await asyncio.gather(
+        *(client.get_users(admin_id) for admin_id in admin_ids),
+        return_exceptions=True,
+    )
+    lines = [
+        f"• User {admin_id}" if isinstance(user, Exception) else f"• {user.mention} ({admin_id})"
+        for admin_id, user in zip(admin_ids, users)
+    ]
+    text = "👮 **Bot Admins:**\n\n" + "\n".join(lines) + "\n"
     
     await message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
-
-# Helper functions
-
-def format_bytes(n: int) -> str:
-    """Format bytes to human readable format"""
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if n < 1024:
-            return f"{n:.2f} {unit}"
-        n /= 1024
-    return f"{n:.2f} PB"
@@ -1,16 +1,16 @@
 """
 Batch/Sequence mode processing for PDF Bot
 """
+import io
 import os
-import tempfile
-import shutil
+import hmac
+import hashlib
 import logging
 import asyncio
-from pathlib import Path
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from datetime import datetime
 
-import pikepdf
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from pyrogram.enums import ParseMode
@@ -22,27 +22,77 @@ from utils.helpers import (
     clean_caption_with_username,
     get_user_temp_dir,
     send_and_delete,
+    send_cached_and_delete,
     create_or_edit_status,
-    is_pdf_file
-)
-from utils.banner_cleaner import clean_pdf_banners
-from link_bot.core import (
-    _ensure_banner_pdf_path,
-    add_banner_pages_to_pdf,
-    lock_pdf_with_password,
-    remove_pages_by_numbers,
+    parse_pages_spec,
+    NO_PAGES_ALIASES,
+    SKIP_ALIASES,
 )
+from utils import pdf_ops
+from utils.fast_download import fast_download
+from utils.pdf_ops import run_pdf_op, split_pages_spec
+from config import BOT_TOKEN
+from link_bot.admin import is_user_in_channel, send_force_join_message
+from link_bot.core import _ensure_banner_pdf_path, create_default_banner_pdf
 
 logger = logging.getLogger(__name__)
 
-from link_bot.batch_state import user_batches, MAX_BATCH_FILES
+from link_bot.batch_state import (
+    BatchFile, user_batches, batch_downloads, MAX_BATCH_FILES, BATCH_IN_MEMORY_MAX,
+)
+
+async def _load_batch(user_id: int) -> List[BatchFile]:
+    """Return the user's batch, loading it from the database if needed.
+
+    After the first load, user_batches is the source of truth (ingest writes
+    to both) until the session is reset, so later actions skip the DB.
+    """
+    session = ensure_session_dict(user_id)
+    files = user_batches.get(user_id)
+    if files or (files is not None and session.get('batch_loaded')):
+        return files
+    
+    files = user_batches[user_id] = [
+        BatchFile.from_doc(doc) for doc in await db.get_batch_files(user_id)
+    ]
+    session['batch_loaded'] = True
+    return files
 
-def clear_user_batch(user_id: int) -> None:
+async def clear_user_batch(user_id: int) -> None:
     """Clear user's batch"""
+    # Drop prefetched copies along with the batch
+    for key in [k for k in batch_downloads if k[0] == user_id]:
+        batch_downloads.pop(key).cancel()
+    await asyncio.to_thread(
+        _unlink_quietly, *(f.local_path for f in user_batches.get(user_id) or ())
+    )
     user_batches[user_id] = []
+    # Known empty now; no need to ask the DB again
+    ensure_session_dict(user_id)['batch_loaded'] = True
     # Also clear from database
-    asyncio.create_task(db.clear_batch(user_id))
-
+    await db.clear_batch(user_id)
+
+async def sweep_batch_prefetches() -> None:
+    """Release prefetches of users who left batch mode without processing.
+
+    Cancel, reset or an expired session ends batch mode without going
+    through clear_user_batch, which would leave the download tasks and
+    their files behind. The batch itself stays in the database and is
+    reloaded (and re-fetched) if the user comes back to it.
+    """
+    stale = {
+        uid for uid in {k[0] for k in batch_downloads} | set(user_batches)
+        if not sessions.get(uid, {}).get('batch_mode')
+    }
+    paths = []
+    for uid in stale:
+        for key in [k for k in batch_downloads if k[0] == uid]:
+            batch_downloads.pop(key).cancel()
+        paths.extend(f.local_path for f in user_batches.pop(uid, None) or ())
+    if paths:
+        await asyncio.to_thread(_unlink_quietly, *paths)
+
+@lru_cache(maxsize=1024)
 def get_batch_pages_buttons(user_id: int) -> InlineKeyboardMarkup:
     """Build batch pages selection keyboard"""
     return InlineKeyboardMarkup([
@@ -58,6 +108,7 @@ def get_batch_pages_buttons(user_id: int) -> InlineKeyboardMarkup:
         ],
     ])
 
+@lru_cache(maxsize=1024)
 def get_batch_both_buttons(user_id: int) -> InlineKeyboardMarkup:
     """Build batch 'The Both' pages selection keyboard"""
     return InlineKeyboardMarkup([
@@ -82,7 +133,6 @@ async def batch_command(client: Client, message: Message):
     await db.track_user(user_id)
     
     # Force-join check
-    from link_bot.admin import is_user_in_channel, send_force_join_message
     if not await is_user_in_channel(client, user_id):
         await send_force_join_message(client, message)
         return
@@ -94,15 +144,8 @@ async def batch_command(client: Client, message: Message):
     # Enable batch mode
     session['batch_mode'] = True
     
-    # Initialize batch if not exists
-    if user_id not in user_batches:
-        user_batches[user_id] = []
-    
     # Load batch from database if empty in memory
-    if not user_batches[user_id]:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    count = len(user_batches[user_id])
+    count = len(await _load_batch(user_id))
     
     if count > 0:
         msg = (
@@ -128,121 +171,354 @@ async def process_batch_command(client: Client, message: Message):
     user_id = message.from_user.id
     
     # Force-join check
-    from link_bot.admin import is_user_in_channel, send_force_join_message
     if not await is_user_in_channel(client, user_id):
         await send_force_join_message(client, message)
         return
     
     # Check batch
-    if user_id not in user_batches:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    batch_files = user_batches[user_id]
+    batch_files = await _load_batch(user_id)
     if not batch_files:
         await message.reply_text("❌ No files waiting in the batch")
         return
     
-    # Filter PDF files
-    pdf_files = [f for f in batch_files if is_pdf_file(f.get('file_name', ''))]
-    
-    if pdf_files:
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔓 Unlock all", callback_data=f"batch_unlock:{user_id}")],
-            [InlineKeyboardButton("🗑️ Remove pages (all)", callback_data=f"batch_pages:{user_id}")],
-            [InlineKeyboardButton("🛠️ The Both (all)", callback_data=f"batch_both:{user_id}")],
-            [InlineKeyboardButton("⚡ Full Process (all)", callback_data=f"batch_fullproc:{user_id}")],
-            [InlineKeyboardButton("🪧 Add banner (all)", callback_data=f"batch_add_banner:{user_id}")],
-            [InlineKeyboardButton("🔐 Lock all", callback_data=f"batch_lock:{user_id}")],
-            [InlineKeyboardButton("🧹 Clear sequence", callback_data=f"batch_clear:{user_id}")],
-        ])
-        
-        await message.reply_text(
-            f"📦 **Sequence Processing**\n\n"
-            f"{len(pdf_files)} PDF(s) ready\n\n"
-            f"What do you want to do?",
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
-        )
-    else:
-        await message.reply_text("✅ All files processed!")
-        clear_user_batch(user_id)
-
-async def process_batch_unlock(client: Client, message: Message, user_id: int, password: str):
-    """Unlock all PDFs in batch"""
-    if user_id not in user_batches:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    files = user_batches[user_id]
-    pdf_files = [f for f in files if is_pdf_file(f['file_name'])]
-    
-    if not pdf_files:
-        await client.send_message(message.chat.id, "❌ No PDF files in batch")
-        return
-    
-    session = ensure_session_dict(user_id)
-    status = await create_or_edit_status(client, message, f"⏳ Processing {len(pdf_files)} PDF files...")
-    success_count = 0
-    error_count = 0
+    # Ingest only admits PDFs, so every batch entry is one
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("🔓 Unlock all", callback_data=f"batch_unlock:{user_id}")],
+        [InlineKeyboardButton("🗑️ Remove pages (all)", callback_data=f"batch_pages:{user_id}")],
+        [InlineKeyboardButton("🛠️ The Both (all)", callback_data=f"batch_both:{user_id}")],
+        [InlineKeyboardButton("⚡ Full Process (all)", callback_data=f"batch_fullproc:{user_id}")],
+        [InlineKeyboardButton("🪧 Add banner (all)", callback_data=f"batch_add_banner:{user_id}")],
+        [InlineKeyboardButton("🔐 Lock all", callback_data=f"batch_lock:{user_id}")],
+        [InlineKeyboardButton("🧹 Clear sequence", callback_data=f"batch_clear:{user_id}")],
+    ])
     
+    await message.reply_text(
+        f"📦 **Sequence Processing**\n\n"
+        f"{len(batch_files)} PDF(s) ready\n\n"
+        f"What do you want to do?",
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+def _dedupe_files(pdf_files: List[BatchFile]) -> Tuple[List[BatchFile], int]:
+    """Drop re-sent copies of the same file, keeping the first.
+
+    Returns (unique files, number of duplicates dropped).
+    """
+    seen = set()
+    unique = []
+    for file_info in pdf_files:
+        # file_id differs between forwards of the same document;
+        # file_unique_id does not
+        key = file_info.file_unique_id or file_info.file_id
+        if key not in seen:
+            seen.add(key)
+            unique.append(file_info)
+    return unique, len(pdf_files) - len(unique)
+
+def _duplicates_note(duplicates: int) -> str:
+    return f"\nSkipped duplicates: {duplicates}" if duplicates else ""
+
+# Workers per pipeline stage; downloads/uploads dominate, so a few in flight
+# overlap network waits without tripping Telegram flood limits
+BATCH_CONCURRENCY = 4
+
+# Hand-off depth between stages, bounding how many finished files wait on disk
+BATCH_QUEUE_SIZE = 2
+
+# Seconds between batch progress edits
+BATCH_PROGRESS_INTERVAL = 2.0
+
+def _unlink_quietly(*paths) -> None:
+    """Remove batch temp files, ignoring ones already gone"""
+    for path in paths:
+        if not path:
+            continue
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+async def _cached_download(user_id: int, file_info: BatchFile) -> Optional[str]:
+    """Path of the copy prefetched on ingest, if it made it to disk"""
+    task = batch_downloads.pop((user_id, file_info.file_id), None)
+    if task is not None:
+        # wait() never raises the task's own outcome; prefetch logs failures
+        await asyncio.wait((task,))
+    path = file_info.local_path
+    return path if path and os.path.exists(path) else None
+
+async def _progress_ticker(status: Message, counts: Dict[str, int], total: int):
+    """Edit status with counts['done'] every BATCH_PROGRESS_INTERVAL until cancelled.
+
+    A single editor on a fixed interval keeps status edits off the workers'
+    path and well under Telegram's edit rate limits.
+    """
+    shown = 0
+    while True:
+        await asyncio.sleep(BATCH_PROGRESS_INTERVAL)
+        if counts['done'] != shown:
+            shown = counts['done']
+            try:
+                await status.edit_text(f"⏳ Processed {shown}/{total} files...", parse_mode=ParseMode.DISABLED)
+            except Exception:
+                pass
+
+def _cache_params(value):
+    """Normalize op args into a stable, hashable description for the result cache"""
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value, key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(_cache_params(v) for v in value)
+    return value
+
+async def _banner_cache_tag(banner_path: Optional[str]) -> tuple:
+    """(path, mtime_ns) of a banner for the result cache key, so results
+    made with a since-replaced banner aren't reused"""
+    if not banner_path:
+        return ()
     try:
-        for i, file_info in enumerate(pdf_files):
+        st = await asyncio.to_thread(os.stat, banner_path)
+    except OSError:
+        return (banner_path,)
+    return (banner_path, st.st_mtime_ns)
+
+async def _run_batch(client: Client, message: Message, user_id: int, pdf_files: List[BatchFile],
+                     status: Message, op, *op_args, cache_tag: tuple = (),
+                     concurrency: int = BATCH_CONCURRENCY) -> Tuple[int, int]:
+    """Download -> process -> upload every batch file through a queue pipeline.
+
+    Each stage runs `concurrency` workers linked by bounded queues, so network
+    transfers overlap the pikepdf work. op(in_path, out_path, *op_args) runs in
+    the PDF process pool; a False result or any exception counts as an error.
+    With op=None each download is sent back as-is, skipping the pool. Files up
+    to BATCH_IN_MEMORY_MAX are handled as bytes (out_path=None) end to end.
+    Results are cached by file_unique_id, op and args: a file already processed
+    the same way is re-sent by its uploaded file_id without any transfer.
+    cache_tag adds state the args don't show, like a banner file's mtime.
+    Returns (success_count, error_count).
+    """
+    session = ensure_session_dict(user_id)
+    tmp = get_user_temp_dir(user_id)
+    chat_id = message.chat.id
+    # Fixed for the whole run, so read once rather than per upload
+    delay = session.get('delete_delay', 300)
+    total = len(pdf_files)
+    pending: asyncio.Queue = asyncio.Queue()
+    dl_q: asyncio.Queue = asyncio.Queue(maxsize=BATCH_QUEUE_SIZE)
+    proc_q: asyncio.Queue = asyncio.Queue(maxsize=BATCH_QUEUE_SIZE)
+    counts = {'done': 0, 'success': 0}
+    op_name = op.__name__ if op is not None else 'rename'
+    op_params = (_cache_params(op_args), cache_tag)
+
+    def _cache_key(file_info: BatchFile) -> Optional[Tuple[str, str, str]]:
+        if not file_info.file_unique_id:
+            return None
+        # The final name is part of the key: a cached file keeps its upload name
+        final_name = build_final_filename(user_id, file_info.file_name)
+        # op_params holds plaintext passwords: key the digest with a server
+        # secret so stored keys can't be brute-forced offline. The bot token
+        # fits, since cached file_ids are only valid for this bot anyway
+        params = hmac.new(
+            BOT_TOKEN.encode(), repr((op_params, final_name)).encode(), hashlib.sha256
+        ).hexdigest()
+        return file_info.file_unique_id, op_name, params
+
+    async def _send_cached(i: int, key) -> bool:
+        file_id = await db.get_cached_result(*key)
+        if not file_id:
+            return False
+        try:
+            await send_cached_and_delete(client, chat_id, file_id, delay_seconds=delay)
+            return True
+        except Exception as e:
+            # Stale or rejected file_id: forget it and process normally
+            logger.warning(f"Cached result for batch file {i} failed, reprocessing: {e}")
+            await db.drop_cached_result(*key)
+            return False
+
+    for item in enumerate(pdf_files):
+        pending.put_nowait(item)
+
+    async def _record(ok: bool, *paths):
+        # Off the loop: unlinking a large file can block for a while
+        if paths:
+            await asyncio.to_thread(_unlink_quietly, *paths)
+        counts['done'] += 1
+        counts['success'] += ok
+
+    async def _downloader():
+        while not pending.empty():
+            i, file_info = pending.get_nowait()
+            key = _cache_key(file_info)
+            if key and await _send_cached(i, key):
+                # Any prefetched copy is cleaned up with the batch
+                await _record(True)
+                continue
+            try:
+                src = await _cached_download(user_id, file_info)
+                if src is None and 0 < (file_info.size or 0) <= BATCH_IN_MEMORY_MAX:
+                    # Small files never touch the disk: bytes go to the pool
+                    # and the result is uploaded straight from memory
+                    buf = await client.download_media(file_info.file_id, in_memory=True)
+                    src = buf.getvalue()
+                elif src is None:
+                    src = await fast_download(
+                        client, file_info.file_id, f"{tmp}/batch_{i}_in.pdf", file_info.size
+                    )
+            except Exception as e:
+                logger.error(f"Error batch download file {i}: {e}")
+                await _record(False)
+                continue
+            await dl_q.put((i, file_info, src))
+
+    async def _processor():
+        while (item := await dl_q.get()) is not None:
+            i, file_info, src = item
+            on_disk = isinstance(src, str)
+            temps = [src] if on_disk else []
+            if op is None:
+                await proc_q.put((i, file_info, src if on_disk else io.BytesIO(src), temps))
+                continue
+            out_path = None
+            if on_disk:
+                out_path = str(tmp / f"batch_{i}_out_{file_info.file_name}")
+                temps.append(out_path)
             try:
-                await status.edit_text(f"⏳ Processing file {i+1}/{len(pdf_files)}...")
-                
-                # Download file
-                file_path = await client.download_media(
-                    file_info['file_id'], 
-                    file_name=f"{get_user_temp_dir(user_id)}/batch_{i}.pdf"
-                )
-                
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    input_path = Path(temp_dir) / "input.pdf"
-                    output_path = Path(temp_dir) / f"unlocked_{file_info['file_name']}"
-                    shutil.move(file_path, input_path)
-                    
-                    # Unlock PDF
-                    with pikepdf.open(input_path, password=password if password.lower() != 'none' else '') as pdf:
-                        pdf.save(output_path)
-                    
-                    # Send unlocked file
-                    new_file_name = build_final_filename(user_id, file_info['file_name'])
-                    delay = session.get('delete_delay', 300)
-                    await send_and_delete(client, message.chat.id, output_path, new_file_name, delay_seconds=delay)
-                    
-                    success_count += 1
-                    
+                result = await run_pdf_op(op, src, out_path, *op_args)
             except Exception as e:
-                logger.error(f"Error batch unlock file {i}: {e}")
-                error_count += 1
+                logger.error(f"Error batch processing file {i}: {e}")
+                result = False
+            if result is False:
+                await _record(False, *temps)
+            else:
+                await proc_q.put((i, file_info, out_path if on_disk else io.BytesIO(result), temps))
+
+    async def _uploader():
+        while (item := await proc_q.get()) is not None:
+            i, file_info, document, temps = item
+            try:
+                new_file_name = build_final_filename(user_id, file_info.file_name)
+                sent = await send_and_delete(client, chat_id, document, new_file_name, delay_seconds=delay)
+                ok = True
+                key = _cache_key(file_info)
+                if key and sent and sent.document:
+                    await db.put_cached_result(*key, sent.document.file_id)
+            except Exception as e:
+                logger.error(f"Error batch upload file {i}: {e}")
+                ok = False
+            await _record(ok, *temps)
+
+    async def _stage(worker, next_q: Optional[asyncio.Queue]):
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # gather leaves the siblings of a failed worker running
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        finally:
+            # One sentinel per downstream worker once this stage has ended,
+            # even by an error, so the next stage drains and stops instead of
+            # waiting forever. Skipped during teardown: the downstream stage is
+            # being cancelled then and may no longer free queue slots
+            if next_q is not None and not stages_failed:
+                for _ in range(concurrency):
+                    await next_q.put(None)
+
+    def _leftover_temps() -> List[str]:
+        # Files still parked between stages when a run is torn down
+        paths = []
+        while not dl_q.empty():
+            item = dl_q.get_nowait()
+            if item is not None and isinstance(item[2], str):
+                paths.append(item[2])
+        while not proc_q.empty():
+            item = proc_q.get_nowait()
+            if item is not None:
+                paths.extend(item[3])
+        return paths
+
+    stages_failed = False
+    ticker = asyncio.create_task(_progress_ticker(status, counts, total))
+    stages = [
+        asyncio.create_task(_stage(_downloader, dl_q)),
+        asyncio.create_task(_stage(_processor, proc_q)),
+        asyncio.create_task(_stage(_uploader, None)),
+    ]
+    try:
+        await asyncio.gather(*stages)
+    except BaseException:
+        # One stage died: stop the others instead of leaving them blocked
+        # on a queue that will never be fed, and drop their parked files
+        stages_failed = True
+        for task in stages:
+            task.cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
+        await asyncio.to_thread(_unlink_quietly, *_leftover_temps())
+        raise
+    finally:
+        ticker.cancel()
+    return counts['success'], total - counts['success']
+
+async def _drive_batch(client: Client, message: Message, user_id: int, pdf_files: List[BatchFile],
+                       status_text: str, op, *op_args, duplicates: int = 0,
+                       done_title: str = "Processing complete!", cache_tag: tuple = ()):
+    """Run op over the batch with a status message, summary and final cleanup.
+
+    Shared tail of every batch action: the batch is cleared and batch mode
+    left whatever happens.
+    """
+    session = ensure_session_dict(user_id)
+    status = await create_or_edit_status(client, message, status_text)
+    
+    try:
+        success_count, error_count = await _run_batch(
+            client, message, user_id, pdf_files, status, op, *op_args, cache_tag=cache_tag
+        )
         
         await status.edit_text(
-            f"✅ Processing complete!\n\n"
+            f"✅ {done_title}\n\n"
             f"Successful: {success_count}\n"
             f"Errors: {error_count}"
+            f"{_duplicates_note(duplicates)}",
+            parse_mode=ParseMode.DISABLED,
         )
         
     finally:
-        clear_user_batch(user_id)
+        await clear_user_batch(user_id)
         session.pop('batch_mode', None)
 
+async def process_batch_unlock(client: Client, message: Message, user_id: int, password: str):
+    """Unlock all PDFs in batch"""
+    files = await _load_batch(user_id)
+    pdf_files, duplicates = _dedupe_files(files)
+    
+    if not pdf_files:
+        await client.send_message(message.chat.id, "❌ No PDF files in batch")
+        return
+    
+    await _drive_batch(
+        client, message, user_id, pdf_files, f"⏳ Processing {len(pdf_files)} PDF files...",
+        pdf_ops.unlock, password, duplicates=duplicates
+    )
+
 async def process_batch_pages(client: Client, message: Message, user_id: int, pages_spec: str):
     """Remove pages from all PDFs in batch"""
-    if user_id not in user_batches:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    files = user_batches[user_id]
-    pdf_files = [f for f in files if is_pdf_file(f['file_name'])]
+    files = await _load_batch(user_id)
+    pdf_files, duplicates = _dedupe_files(files)
     
     if not pdf_files:
         await client.send_message(message.chat.id, "❌ No PDF files in batch")
         return
     
     # Parse pages specification
-    from utils.helpers import parse_pages_spec
     pages_to_remove = set()
     
     spec = (pages_spec or '').strip().lower()
-    if spec in {"none", "no", "skip", "0"}:
+    if spec in NO_PAGES_ALIASES:
         pages_to_remove = set()
     elif spec == "first":
         pages_to_remove = {1}
@@ -253,86 +529,25 @@ async def process_batch_pages(client: Client, message: Message, user_id: int, pa
     else:
         pages_to_remove = set(parse_pages_spec(pages_spec))
     
-    session = ensure_session_dict(user_id)
-    status = await create_or_edit_status(client, message, f"⏳ Processing {len(pdf_files)} PDF files...")
-    success_count = 0
-    error_count = 0
+    # Nothing to remove: the files only need renaming, so skip the
+    # open/save round-trip instead of re-writing every PDF unchanged
+    op = pdf_ops.remove_pages if pages_to_remove else None
     
-    try:
-        for i, file_info in enumerate(pdf_files):
-            try:
-                await status.edit_text(f"⏳ Processing file {i+1}/{len(pdf_files)}...")
-                
-                # Download file
-                file_path = await client.download_media(
-                    file_info['file_id'],
-                    file_name=f"{get_user_temp_dir(user_id)}/batch_{i}.pdf"
-                )
-                
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    input_path = Path(temp_dir) / "input.pdf"
-                    output_path = Path(temp_dir) / f"modified_{file_info['file_name']}"
-                    shutil.move(file_path, input_path)
-                    
-                    with pikepdf.open(input_path) as pdf:
-                        # Compute dynamic pages if needed
-                        effective_remove = set()
-                        if "__LAST__" in pages_to_remove:
-                            effective_remove.add(len(pdf.pages))
-                        if "__MIDDLE__" in pages_to_remove:
-                            effective_remove.add(max(1, len(pdf.pages) // 2))
-                        # Add static pages
-                        effective_remove.update({p for p in pages_to_remove if isinstance(p, int)})
-                        
-                        # Keep pages not in removal list
-                        pages_to_keep = [p for i, p in enumerate(pdf.pages) if (i + 1) not in effective_remove]
-                        
-                        if not pages_to_keep:
-                            error_count += 1
-                            continue
-                        
-                        # Create new PDF with remaining pages
-                        new_pdf = pikepdf.new()
-                        for page in pages_to_keep:
-                            new_pdf.pages.append(page)
-                        
-                        new_pdf.save(output_path)
-                    
-                    # Send modified file
-                    new_file_name = build_final_filename(user_id, file_info['file_name'])
-                    delay = session.get('delete_delay', 300)
-                    await send_and_delete(client, message.chat.id, output_path, new_file_name, delay_seconds=delay)
-                    
-                    success_count += 1
-                    
-            except Exception as e:
-                logger.error(f"Error batch pages file {i}: {e}")
-                error_count += 1
-        
-        await status.edit_text(
-            f"✅ Processing complete!\n\n"
-            f"Successful: {success_count}\n"
-            f"Errors: {error_count}"
-        )
-        
-    finally:
-        clear_user_batch(user_id)
-        session.pop('batch_mode', None)
+    await _drive_batch(
+        client, message, user_id, pdf_files, f"⏳ Processing {len(pdf_files)} PDF files...",
+        op, split_pages_spec(pages_to_remove), duplicates=duplicates
+    )
 
 async def process_batch_both(client: Client, message: Message, user_id: int, password: str, pages_spec: str):
     """Combined unlock + remove pages for all PDFs"""
-    if user_id not in user_batches:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    files = user_batches[user_id]
-    pdf_files = [f for f in files if is_pdf_file(f['file_name'])]
+    files = await _load_batch(user_id)
+    pdf_files, duplicates = _dedupe_files(files)
     
     if not pdf_files:
         await client.send_message(message.chat.id, "❌ No PDF files in batch")
         return
     
     # Parse pages
-    from utils.helpers import parse_pages_spec
     pages_to_remove = set()
     
     spec = (pages_spec or '').strip().lower()
@@ -345,82 +560,16 @@ async def process_batch_both(client: Client, message: Message, user_id: int, pas
     else:
         pages_to_remove = set(parse_pages_spec(pages_spec))
     
-    session = ensure_session_dict(user_id)
-    status = await create_or_edit_status(client, message, f"⏳ Combined processing of {len(pdf_files)} PDF files...")
-    success_count = 0
-    error_count = 0
-    
-    try:
-        for i, file_info in enumerate(pdf_files):
-            try:
-                await status.edit_text(f"⏳ Processing file {i+1}/{len(pdf_files)}...")
-                
-                # Download file
-                file_path = await client.download_media(
-                    file_info['file_id'],
-                    file_name=f"{get_user_temp_dir(user_id)}/batch_{i}.pdf"
-                )
-                
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    input_path = Path(temp_dir) / "input.pdf"
-                    output_path = Path(temp_dir) / f"both_{file_info['file_name']}"
-                    shutil.move(file_path, input_path)
-                    
-                    # Open with password and process
-                    with pikepdf.open(input_path, password=password if password.lower() != 'none' else '') as pdf:
-                        # Compute pages to remove
-                        effective_remove = set()
-                        if "__LAST__" in pages_to_remove:
-                            effective_remove.add(len(pdf.pages))
-                        if "__MIDDLE__" in pages_to_remove:
-                            effective_remove.add(max(1, len(pdf.pages) // 2))
-                        effective_remove.update({p for p in pages_to_remove if isinstance(p, int)})
-                        
-                        # Keep remaining pages
-                        pages_to_keep = [p for i, p in enumerate(pdf.pages) if (i + 1) not in effective_remove]
-                        
-                        if not pages_to_keep:
-                            error_count += 1
-                            continue
-                        
-                        # Create new PDF
-                        new_pdf = pikepdf.new()
-                        for page in pages_to_keep:
-                            new_pdf.pages.append(page)
-                        
-                        new_pdf.save(output_path)
-                    
-                    # Send processed file
-                    new_file_name = build_final_filename(user_id, file_info['file_name'])
-                    delay = session.get('delete_delay', 300)
-                    await send_and_delete(client, message.chat.id, output_path, new_file_name, delay_seconds=delay)
-                    
-                    success_count += 1
-                    
-            except Exception as e:
-                logger.error(f"Error batch both file {i}: {e}")
-                error_count += 1
-        
-        await status.edit_text(
-            f"✅ Processing complete!\n\n"
-            f"Successful: {success_count}\n"
-            f"Errors: {error_count}"
-        )
-        
-    finally:
-        clear_user_batch(user_id)
-        session.pop('batch_mode', None)
+    await _drive_batch(
+        client, message, user_id, pdf_files, f"⏳ Combined processing of {len(pdf_files)} PDF files...",
+        pdf_ops.unlock_and_remove_pages, password, split_pages_spec(pages_to_remove),
+        duplicates=duplicates
+    )
 
 async def process_batch_add_banner(client: Client, message: Message, user_id: int):
     """Add banner to all PDFs in batch"""
-    # Import banner functions from core
-    from link_bot.core import _ensure_banner_pdf_path, add_banner_pages_to_pdf
-    
-    if user_id not in user_batches:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    files = user_batches[user_id]
-    pdf_files = [f for f in files if is_pdf_file(f['file_name'])]
+    files = await _load_batch(user_id)
+    pdf_files, duplicates = _dedupe_files(files)
     
     if not pdf_files:
         await client.send_message(message.chat.id, "❌ No PDF files in batch")
@@ -431,60 +580,16 @@ async def process_batch_add_banner(client: Client, message: Message, user_id: in
         await client.send_message(message.chat.id, "❌ No default banner. Use /setbanner first.")
         return
     
-    session = ensure_session_dict(user_id)
-    status = await create_or_edit_status(client, message, f"⏳ Adding banner to {len(pdf_files)} PDF files...")
-    success_count = 0
-    error_count = 0
-    
-    try:
-        for i, file_info in enumerate(pdf_files):
-            try:
-                await status.edit_text(f"⏳ Processing file {i+1}/{len(pdf_files)}...")
-                
-                # Download file
-                file_path = await client.download_media(
-                    file_info['file_id'],
-                    file_name=f"{get_user_temp_dir(user_id)}/batch_{i}.pdf"
-                )
-                
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    input_path = Path(temp_dir) / "input.pdf"
-                    output_path = Path(temp_dir) / file_info['file_name']
-                    shutil.move(file_path, input_path)
-                    
-                    # Add banner
-                    await add_banner_pages_to_pdf(str(input_path), str(output_path), banner_pdf, place='after')
-                    
-                    # Send file with banner
-                    new_file_name = build_final_filename(user_id, file_info['file_name'])
-                    delay = session.get('delete_delay', 300)
-                    await send_and_delete(client, message.chat.id, output_path, new_file_name, delay_seconds=delay)
-                    
-                    success_count += 1
-                    
-            except Exception as e:
-                logger.error(f"Error batch add banner file {i}: {e}")
-                error_count += 1
-        
-        await status.edit_text(
-            f"✅ Processing complete!\n\n"
-            f"Successful: {success_count}\n"
-            f"Errors: {error_count}"
-        )
-        
-    finally:
-        clear_user_batch(user_id)
-        session.pop('batch_mode', None)
+    await _drive_batch(
+        client, message, user_id, pdf_files, f"⏳ Adding banner to {len(pdf_files)} PDF files...",
+        pdf_ops.add_banner, banner_pdf, 'after', duplicates=duplicates,
+        cache_tag=await _banner_cache_tag(banner_pdf)
+    )
 
 async def process_batch_lock(client: Client, message: Message, user_id: int, password: str):
     """Lock all PDFs in batch"""
-    from link_bot.core import lock_pdf_with_password
-    
-    if user_id not in user_batches:
-        user_batches[user_id] = await db.get_batch_files(user_id)
-    
-    files = user_batches[user_id]
-    pdf_files = [f for f in files if is_pdf_file(f['file_name'])]
+    files = await _load_batch(user_id)
+    pdf_files, duplicates = _dedupe_files(files)
     
     if not pdf_files:
         await client.send_message(message.chat.id, "❌ No PDF files in batch")
@@ -499,320 +604,219 @@ async def process_batch_lock(client: Client, message: Message, user_id: int, pas
         await client.send_message(message.chat.id, "ℹ️ No password provided — proceeding without lock.")
         return
     
-    session = ensure_session_dict(user_id)
-    status = await create_or_edit_status(client, message, f"⏳ Locking {len(pdf_files)} PDF files...")
-    success_count = 0
-    error_count = 0
-    
-    try:
-        for i, file_info in enumerate(pdf_files):
-            try:
-                await status.edit_text(f"⏳ Processing file {i+1}/{len(pdf_files)}...")
-                
-                # Download file
-                file_path = await client.download_media(
-                    file_info['file_id'],
-                    file_name=f"{get_user_temp_dir(user_id)}/batch_{i}.pdf"
-                )
-                
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    input_path = Path(temp_dir) / "input.pdf"
-                    output_path = Path(temp_dir) / f"locked_{file_info['file_name']}"
-                    shutil.move(file_path, input_path)
-                    
-                    # Lock PDF
-                    lock_pdf_with_password(str(input_path), str(output_path), password)
-                    
-                    # Send locked file
-                    new_file_name = build_final_filename(user_id, file_info['file_name'])
-                    delay = session.get('delete_delay', 300)
-                    await send_and_delete(client, message.chat.id, output_path, new_file_name, delay_seconds=delay)
-                    
-                    success_count += 1
-                    
-            except Exception as e:
-                logger.error(f"Error batch lock file {i}: {e}")
-                error_count += 1
-        
-        await status.edit_text(
-            f"✅ Processing complete!\n\n"
-            f"Successful: {success_count}\n"
-            f"Errors: {error_count}"
-        )
-        
-    finally:
-        clear_user_batch(user_id)
-        session.pop('batch_mode', None)
+    await _drive_batch(
+        client, message, user_id, pdf_files, f"⏳ Locking {len(pdf_files)} PDF files...",
+        pdf_ops.lock, password, duplicates=duplicates
+    )
 
 # Callback handlers for batch operations
-@Client.on_callback_query(filters.regex(r"^batch_"))
+async def _cb_clear(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    await clear_user_batch(user_id)
+    await query.edit_message_text("🧹 Batch cleared successfully!")
+
+async def _cb_unlock(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    session['batch_action'] = 'unlock'
+    session['awaiting_batch_password'] = True
+    await query.edit_message_text("🔐 Send me the password for all PDFs:")
+
+async def _cb_pages(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    session['batch_action'] = 'pages'
+    await query.edit_message_text(
+        "📝 **Remove Pages (Batch)**\n\n"
+        "Choose a quick option or enter pages manually.",
+        reply_markup=get_batch_pages_buttons(user_id)
+    )
+
+async def _cb_both(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    session['batch_action'] = 'both'
+    session['awaiting_batch_both_password'] = True
+    await query.edit_message_text(
+        "🛠️ **The Both - Batch**\n\n"
+        "Step 1/2: Send me the password (or 'none' if not protected):"
+    )
+
+async def _cb_add_banner(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    await process_batch_add_banner(client, query.message, user_id)
+
+async def _cb_lock(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    settings = await db.get_user_settings(user_id)
+    password = settings.get('lock_password')
+    await process_batch_lock(client, query.message, user_id, password)
+
+async def _cb_fullproc(client: Client, query: CallbackQuery, user_id: int, session: dict):
+    session['batch_action'] = 'fullproc'
+    session['awaiting_batch_fullproc_password'] = True
+    await query.edit_message_text(
+        "⚡ **Full Process - Batch**\n\n"
+        "Step 1/3: Send unlock password (or 'none' if not protected):",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+def _cb_pages_quick(spec: str):
+    async def handler(client: Client, query: CallbackQuery, user_id: int, session: dict):
+        await process_batch_pages(client, query.message, user_id, spec)
+    return handler
+
+def _cb_both_quick(spec: str):
+    async def handler(client: Client, query: CallbackQuery, user_id: int, session: dict):
+        password = session.get('batch_both_password', '')
+        await process_batch_both(client, query.message, user_id, password, spec)
+    return handler
+
+def _cb_manual(flag: str):
+    async def handler(client: Client, query: CallbackQuery, user_id: int, session: dict):
+        session[flag] = True
+        await query.edit_message_text("📝 Send pages to remove (e.g. `1,3-5`) or `none`.")
+    return handler
+
+# Batch callback action -> handler, built once at import
+_BATCH_DISPATCH: Dict[str, Callable[[Client, CallbackQuery, int, dict], Awaitable[None]]] = {
+    "batch_clear": _cb_clear,
+    "batch_unlock": _cb_unlock,
+    "batch_pages": _cb_pages,
+    "batch_both": _cb_both,
+    "batch_add_banner": _cb_add_banner,
+    "batch_lock": _cb_lock,
+    "batch_fullproc": _cb_fullproc,
+    # Pages selection handlers
+    "batch_pages_first": _cb_pages_quick("first"),
+    "batch_pages_last": _cb_pages_quick("last"),
+    "batch_pages_middle": _cb_pages_quick("middle"),
+    "batch_pages_manual": _cb_manual('awaiting_batch_pages'),
+    # The Both pages selection
+    "batch_both_first": _cb_both_quick("first"),
+    "batch_both_last": _cb_both_quick("last"),
+    "batch_both_middle": _cb_both_quick("middle"),
+    "batch_both_manual": _cb_manual('awaiting_batch_both_pages'),
+}
+
+@Client.on_callback_query(filters.regex(r"^(batch_[a-z_]+):(\d+)$"))
 async def handle_batch_callbacks(client: Client, query: CallbackQuery):
     """Handle all batch-related callbacks"""
     await query.answer()
     
-    data = query.data
-    parts = data.split(":")
-    action = parts[0]
-    user_id = int(parts[1]) if len(parts) > 1 else query.from_user.id
+    # The handler regex already captured the fields
+    action, uid = query.matches[0].groups()
+    user_id = int(uid)
     
     # Verify user
     if query.from_user.id != user_id:
         await query.answer("❌ This is not for you!", show_alert=True)
         return
     
-    session = ensure_session_dict(user_id)
-    
-    # Handle different batch actions
-    if action == "batch_clear":
-        clear_user_batch(user_id)
-        await query.edit_message_text("🧹 Batch cleared successfully!")
-    
-    elif action == "batch_unlock":
-        session['batch_action'] = 'unlock'
-        session['awaiting_batch_password'] = True
-        await query.edit_message_text("🔐 Send me the password for all PDFs:")
-    
-    elif action == "batch_pages":
-        session['batch_action'] = 'pages'
-        await query.edit_message_text(
-            "📝 **Remove Pages (Batch)**\n\n"
-            "Choose a quick option or enter pages manually.",
-            reply_markup=get_batch_pages_buttons(user_id)
-        )
-    
-    elif action == "batch_both":
-        session['batch_action'] = 'both'
-        session['awaiting_batch_both_password'] = True
-        await query.edit_message_text(
-            "🛠️ **The Both - Batch**\n\n"
-            "Step 1/2: Send me the password (or 'none' if not protected):"
-        )
-    
-    elif action == "batch_add_banner":
-        await process_batch_add_banner(client, query.message, user_id)
-    
-    elif action == "batch_lock":
-        settings = await db.get_user_settings(user_id)
-        password = settings.get('lock_password')
-        await process_batch_lock(client, query.message, user_id, password)
-    
-    elif action == "batch_fullproc":
-        session['batch_action'] = 'fullproc'
-        session['awaiting_batch_fullproc_password'] = True
-        await query.edit_message_text(
-            "⚡ **Full Process - Batch**\n\n"
-            "Step 1/3: Send unlock password (or 'none' if not protected):",
-            parse_mode=ParseMode.MARKDOWN
+    handler = _BATCH_DISPATCH.get(action)
+    if handler:
+        await handler(client, query, user_id, ensure_session_dict(user_id))
+
+def _awaiting(key: str):
+    """Filter for text replies to a batch step, so Pyrogram only dispatches
+    a message to the handler whose step the user is actually in"""
+    return filters.text & filters.private & filters.create(
+        lambda _, __, m: bool(
+            m.from_user and sessions.get(m.from_user.id, {}).get(key)
         )
-    
-    # Pages selection handlers
-    elif action == "batch_pages_first":
-        await process_batch_pages(client, query.message, user_id, "first")
-    elif action == "batch_pages_last":
-        await process_batch_pages(client, query.message, user_id, "last")
-    elif action == "batch_pages_middle":
-        await process_batch_pages(client, query.message, user_id, "middle")
-    elif action == "batch_pages_manual":
-        session['awaiting_batch_pages'] = True
-        await query.edit_message_text("📝 Send pages to remove (e.g. `1,3-5`) or `none`.")
-    
-    # The Both pages selection
-    elif action == "batch_both_first":
-        password = session.get('batch_both_password', '')
-        await process_batch_both(client, query.message, user_id, password, "first")
-    elif action == "batch_both_last":
-        password = session.get('batch_both_password', '')
-        await process_batch_both(client, query.message, user_id, password, "last")
-    elif action == "batch_both_middle":
-        password = session.get('batch_both_password', '')
-        await process_batch_both(client, query.message, user_id, password, "middle")
-    elif action == "batch_both_manual":
-        session['awaiting_batch_both_pages'] = True
-        await query.edit_message_text("📝 Send pages to remove (e.g. `1,3-5`) or `none`.")
+    )
 
-@Client.on_message(filters.text & filters.private)
-async def handle_batch_text_steps(client: Client, message: Message):
-    """Handle interactive text steps for batch workflows."""
+async def _take_step_reply(message: Message, session: dict, key: str) -> str:
+    """Leave the step and return the reply text, deleting the message since
+    it may hold a password"""
+    session.pop(key, None)
+    text = (message.text or '').strip()
+    try:
+        await message.delete()
+    except Exception:
+        pass
+    return text
+
+# Unlock (all)
+@Client.on_message(_awaiting('awaiting_batch_password'))
+async def _step_unlock_password(client: Client, message: Message):
     user_id = message.from_user.id
     session = ensure_session_dict(user_id)
+    password = await _take_step_reply(message, session, 'awaiting_batch_password')
+    await process_batch_unlock(client, message, user_id, password)
 
-    # Unlock (all)
-    if session.get('awaiting_batch_password'):
-        session.pop('awaiting_batch_password', None)
-        password = (message.text or '').strip()
-        try:
-            await message.delete()
-        except Exception:
-            pass
-        await process_batch_unlock(client, message, user_id, password)
-        return
-
-    # Pages (all)
-    if session.get('awaiting_batch_pages'):
-        session.pop('awaiting_batch_pages', None)
-        pages_spec = (message.text or '').strip()
-        try:
-            await message.delete()
-        except Exception:
-            pass
-        await process_batch_pages(client, message, user_id, pages_spec)
-        return
-
-    # The Both - step 1 password
-    if session.get('awaiting_batch_both_password'):
-        session.pop('awaiting_batch_both_password', None)
-        password = (message.text or '').strip()
-        session['batch_both_password'] = password
-        try:
-            await message.delete()
-        except Exception:
-            pass
-        await message.reply_text(
-            "🛠️ **The Both - Batch**\n\nStep 2/2: Send pages to remove (e.g. `1,3-5`) or `none`.",
-            parse_mode=ParseMode.MARKDOWN
-        )
-        session['awaiting_batch_both_pages'] = True
-        return
-
-    # The Both - step 2 pages
-    if session.get('awaiting_batch_both_pages'):
-        session.pop('awaiting_batch_both_pages', None)
-        pages_spec = (message.text or '').strip()
-        password = session.get('batch_both_password', '')
-        session.pop('batch_both_password', None)
-        try:
-            await message.delete()
-        except Exception:
-            pass
-        await process_batch_both(client, message, user_id, password, pages_spec)
-        return
-
-    # Full Process - step 1 unlock password
-    if session.get('awaiting_batch_fullproc_password'):
-        session.pop('awaiting_batch_fullproc_password', None)
-        session['batch_fullproc_password'] = (message.text or '').strip()
-        try:
-            await message.delete()
-        except Exception:
-            pass
-        await message.reply_text("**Full Process - Batch**\n\nStep 2/3: Pages to remove (e.g. `1,3-5`) or `none`.", parse_mode=ParseMode.MARKDOWN)
-        session['awaiting_batch_fullproc_pages'] = True
-        return
-
-    # Full Process - step 2 pages
-    if session.get('awaiting_batch_fullproc_pages'):
-        session.pop('awaiting_batch_fullproc_pages', None)
-        session['batch_fullproc_pages'] = (message.text or '').strip()
-        try:
-            await message.delete()
-        except Exception:
-            pass
-        await message.reply_text("**Full Process - Batch**\n\nStep 3/3: Lock password (or `skip`).", parse_mode=ParseMode.MARKDOWN)
-        session['awaiting_batch_fullproc_lock'] = True
-        return
-
-    # Full Process - step 3 lock password and execute
-    if session.get('awaiting_batch_fullproc_lock'):
-        session.pop('awaiting_batch_fullproc_lock', None)
-        lock_pw = (message.text or '').strip()
-        try:
-            await message.delete()
-        except Exception:
-            pass
+# Pages (all)
+@Client.on_message(_awaiting('awaiting_batch_pages'))
+async def _step_pages(client: Client, message: Message):
+    user_id = message.from_user.id
+    session = ensure_session_dict(user_id)
+    pages_spec = await _take_step_reply(message, session, 'awaiting_batch_pages')
+    await process_batch_pages(client, message, user_id, pages_spec)
+
+# The Both - step 1 password
+@Client.on_message(_awaiting('awaiting_batch_both_password'))
+async def _step_both_password(client: Client, message: Message):
+    session = ensure_session_dict(message.from_user.id)
+    session['batch_both_password'] = await _take_step_reply(message, session, 'awaiting_batch_both_password')
+    await message.reply_text(
+        "🛠️ **The Both - Batch**\n\nStep 2/2: Send pages to remove (e.g. `1,3-5`) or `none`.",
+        parse_mode=ParseMode.MARKDOWN
+    )
+    session['awaiting_batch_both_pages'] = True
+
+# The Both - step 2 pages
+@Client.on_message(_awaiting('awaiting_batch_both_pages'))
+async def _step_both_pages(client: Client, message: Message):
+    user_id = message.from_user.id
+    session = ensure_session_dict(user_id)
+    pages_spec = await _take_step_reply(message, session, 'awaiting_batch_both_pages')
+    password = session.pop('batch_both_password', '')
+    await process_batch_both(client, message, user_id, password, pages_spec)
+
+# Full Process - step 1 unlock password
+@Client.on_message(_awaiting('awaiting_batch_fullproc_password'))
+async def _step_fullproc_password(client: Client, message: Message):
+    session = ensure_session_dict(message.from_user.id)
+    session['batch_fullproc_password'] = await _take_step_reply(message, session, 'awaiting_batch_fullproc_password')
+    await message.reply_text("**Full Process - Batch**\n\nStep 2/3: Pages to remove (e.g. `1,3-5`) or `none`.", parse_mode=ParseMode.MARKDOWN)
+    session['awaiting_batch_fullproc_pages'] = True
+
+# Full Process - step 2 pages
+@Client.on_message(_awaiting('awaiting_batch_fullproc_pages'))
+async def _step_fullproc_pages(client: Client, message: Message):
+    session = ensure_session_dict(message.from_user.id)
+    session['batch_fullproc_pages'] = await _take_step_reply(message, session, 'awaiting_batch_fullproc_pages')
+    await message.reply_text("**Full Process - Batch**\n\nStep 3/3: Lock password (or `skip`).", parse_mode=ParseMode.MARKDOWN)
+    session['awaiting_batch_fullproc_lock'] = True
+
+# Full Process - step 3 lock password and execute
+@Client.on_message(_awaiting('awaiting_batch_fullproc_lock'))
+async def _step_fullproc_lock(client: Client, message: Message):
+    user_id = message.from_user.id
+    session = ensure_session_dict(user_id)
+    lock_pw = await _take_step_reply(message, session, 'awaiting_batch_fullproc_lock')
 
-        files = user_batches.get(user_id) or await db.get_batch_files(user_id)
-        pdf_files = [f for f in files if is_pdf_file(f.get('file_name', ''))]
-        unlock_pw = session.pop('batch_fullproc_password', '')
-        pages_text = session.pop('batch_fullproc_pages', 'none')
+    files = await _load_batch(user_id)
+    pdf_files, duplicates = _dedupe_files(files)
+    unlock_pw = session.pop('batch_fullproc_password', '')
+    pages_text = session.pop('batch_fullproc_pages', 'none')
 
-        # Parse pages
-        from utils.helpers import parse_pages_spec
-        pages_to_remove = [] if pages_text.strip().lower() in {'none', 'no', 'skip', '0'} else list(parse_pages_spec(pages_text))
-        if lock_pw.lower() in {'skip', 'none', 'no'}:
-            lock_pw = ''
+    # Parse pages
+    pages_to_remove = [] if pages_text.strip().lower() in NO_PAGES_ALIASES else list(parse_pages_spec(pages_text))
+    if lock_pw.lower() in SKIP_ALIASES:
+        lock_pw = ''
 
-        await execute_batch_full_pipeline(client, message, user_id, pdf_files, unlock_pw, pages_to_remove, lock_pw)
-        return
+    await execute_batch_full_pipeline(client, message, user_id, pdf_files, unlock_pw, pages_to_remove, lock_pw,
+                                      duplicates=duplicates)
 
 async def execute_batch_full_pipeline(client: Client, message: Message, user_id: int,
-                                      files: List[Dict], unlock_pw: str,
-                                      pages_to_remove: List[int], lock_pw: str):
+                                      files: List[BatchFile], unlock_pw: str,
+                                      pages_to_remove: List[int], lock_pw: str,
+                                      duplicates: int = 0):
     """Execute Full Process pipeline for all PDFs in batch."""
     if not files:
         await message.reply_text("❌ No PDF files in batch")
         return
 
-    session = ensure_session_dict(user_id)
-    status = await create_or_edit_status(client, message, f"⏳ Full Process on {len(files)} files...")
-    success = 0
-    errors = 0
-
-    try:
-        for i, file_info in enumerate(files):
-            try:
-                await status.edit_text(f"⏳ Processing file {i+1}/{len(files)}...")
-
-                # Download
-                file_path = await client.download_media(
-                    file_info['file_id'],
-                    file_name=f"{get_user_temp_dir(user_id)}/batch_{i}.pdf"
-                )
-
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    current = Path(temp_dir) / "input.pdf"
-                    shutil.move(file_path, current)
-
-                    # 1. Unlock
-                    if unlock_pw and unlock_pw.lower() != 'none':
-                        unlocked = Path(temp_dir) / "unlocked.pdf"
-                        with pikepdf.open(str(current), password=unlock_pw) as pdf:
-                            pdf.save(str(unlocked))
-                        current = unlocked
-
-                    # 2. Clean banners
-                    with open(current, 'rb') as f:
-                        pdf_bytes = f.read()
-                    cleaned_bytes = clean_pdf_banners(pdf_bytes, user_id)
-                    cleaned = Path(temp_dir) / "cleaned.pdf"
-                    with open(cleaned, 'wb') as f:
-                        f.write(cleaned_bytes)
-                    current = cleaned
-
-                    # 3. Add banner
-                    banner_pdf = await _ensure_banner_pdf_path(user_id)
-                    if not banner_pdf:
-                        from link_bot.core import create_default_banner_pdf
-                        banner_pdf = create_default_banner_pdf(user_id)
-                    if banner_pdf:
-                        bannered = Path(temp_dir) / "bannered.pdf"
-                        await add_banner_pages_to_pdf(str(current), str(bannered), banner_pdf, 'after')
-                        current = bannered
-
-                    # 4. Remove pages
-                    if pages_to_remove:
-                        paged = Path(temp_dir) / "paged.pdf"
-                        remove_pages_by_numbers(str(current), str(paged), pages_to_remove)
-                        current = paged
-
-                    # 5. Lock
-                    if lock_pw:
-                        locked = Path(temp_dir) / "locked.pdf"
-                        lock_pdf_with_password(str(current), str(locked), lock_pw)
-                        current = locked
-
-                    # Send
-                    new_name = build_final_filename(user_id, file_info['file_name'])
-                    delay = session.get('delete_delay', 300)
-                    await send_and_delete(client, message.chat.id, str(current), new_name, delay_seconds=delay)
-                    success += 1
-
-            except Exception as e:
-                logger.error(f"Batch Full Process error on file {i}: {e}")
-                errors += 1
-
-        await status.edit_text(
-            f"✅ Full Process complete!\n\nSuccessful: {success}\nErrors: {errors}"
-        )
-    finally:
-        clear_user_batch(user_id)
-        session.pop('batch_mode', None)
+    banner_pdf = await _ensure_banner_pdf_path(user_id)
+    if not banner_pdf:
+        banner_pdf = await asyncio.to_thread(create_default_banner_pdf, user_id)
+
+    # Unlock -> clean -> banner -> pages -> lock in one pool call per file
+    await _drive_batch(
+        client, message, user_id, files, f"⏳ Full Process on {len(files)} files...",
+        pdf_ops.full_process, unlock_pw, banner_pdf, split_pages_spec(pages_to_remove), lock_pw, user_id,
+        duplicates=duplicates, done_title="Full Process complete!",
+        cache_tag=await _banner_cache_tag(banner_pdf)
+    )
@@ -1,17 +1,51 @@
 """
 Shared batch state and constants to avoid circular imports.
 """
-from typing import Dict, List
+import asyncio
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class BatchFile:
+    """One file queued in a user's batch"""
+    file_id: str
+    file_name: str
+    message_id: Optional[int] = None
+    size: int = 0
+    is_video: bool = False
+    local_path: Optional[str] = None
+    # Stable across re-sends of the same content, unlike file_id
+    file_unique_id: Optional[str] = None
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> 'BatchFile':
+        """Build from a batch_files document, ignoring DB-only keys"""
+        return cls(**{k: doc[k] for k in _BATCH_FILE_FIELDS if k in doc})
+
+    def to_doc(self) -> dict:
+        return asdict(self)
+
+
+_BATCH_FILE_FIELDS = tuple(f.name for f in fields(BatchFile))
 
 # Global batch storage
-user_batches: Dict[int, List[dict]] = {}
+user_batches: Dict[int, List[BatchFile]] = {}
+
+# Downloads started when a file joins the batch, keyed by (user_id, file_id)
+batch_downloads: Dict[Tuple[int, str], asyncio.Task] = {}
 
 # Maximum files allowed in batch
 MAX_BATCH_FILES: int = 24
 
+# Files at or under this size are downloaded, processed and sent from
+# memory at process time, so they are not prefetched to disk on ingest
+BATCH_IN_MEMORY_MAX: int = 10 * 1024 * 1024
+
 __all__ = [
+    'BatchFile',
     'user_batches',
+    'batch_downloads',
     'MAX_BATCH_FILES',
+    'BATCH_IN_MEMORY_MAX',
 ]
-
-
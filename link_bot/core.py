@@ -3,12 +3,13 @@ Core PDF processing functions for PDF Bot
 Handles individual PDF operations
 """
 import os
+import hashlib
 import tempfile
 import shutil
 import logging
 import asyncio
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 import time
 
@@ -33,11 +34,20 @@ from utils.helpers import (
     parse_pages_spec,
     parse_pages_text,
     is_duplicate_message,
-    send_limit_message
+    send_limit_message,
+    format_bytes,
+    format_uptime,
+    NO_PAGES_ALIASES,
+    SKIP_ALIASES,
 )
 from link_bot.admin import is_user_in_channel, send_force_join_message
-from link_bot.batch_state import user_batches, MAX_BATCH_FILES
-from utils.banner_cleaner import clean_pdf_banners
+from link_bot.batch_state import (
+    BatchFile, user_batches, batch_downloads, MAX_BATCH_FILES, BATCH_IN_MEMORY_MAX,
+)
+from config import MESSAGES
+from utils import pdf_ops
+from utils.pdf_ops import run_pdf_op, split_pages_spec
+from utils.fast_download import fast_download
 
 logger = logging.getLogger(__name__)
 
@@ -45,12 +55,14 @@ logger = logging.getLogger(__name__)
 BANNERS_DIR = Path("banners")
 BANNERS_DIR.mkdir(exist_ok=True)
 
+# Converted banner PDFs: source image path -> (source mtime_ns, pdf path)
+_banner_pdf_cache: Dict[str, Tuple[int, str]] = {}
+
 # Uptime reference
 START_TS = time.time()
 
 # Debug echo (optional via env DEBUG_ECHO=1)
-import os as _os
-_DEBUG_ECHO = str(_os.getenv('DEBUG_ECHO', '0')).strip() not in {'0', 'false', 'False', ''}
+_DEBUG_ECHO = str(os.getenv('DEBUG_ECHO', '0')).strip() not in {'0', 'false', 'False', ''}
 
 @Client.on_message()
 async def debug_echo(client: Client, message: Message):
@@ -62,37 +74,6 @@ async def debug_echo(client: Client, message: Message):
     except Exception as e:
         logger.error(f"debug_echo error: {e}")
 
-# Messages
-MESSAGES = {
-    'start': """👋 Welcome to Advanced PDF Tools Bot!
-
-Send me a PDF and I'll help you clean, edit, add banner and lock it.
-
-📋 Features:
-• Rename file (clean usernames)
-• Unlock protected PDFs  
-• Remove pages
-• Add your default banner
-• Lock with your default password
-• Batch processing
-
-🎯 Commands:
-/start - Show this message
-/batch - Enable sequence mode
-/process - Process sequence files
-/setbanner - Set your default banner
-/setpassword - Set default lock password
-/status - Check bot status
-
-📤 Just send me a PDF to get started!""",
-    'not_pdf': "❌ This is not a PDF file!",
-    'file_too_big': "❌ File is too large!",
-    'processing': "⏳ Processing...",
-    'success_unlock': "✅ PDF unlocked successfully!",
-    'success_pages': "✅ Pages removed successfully!",
-    'error': "❌ Error during processing"
-}
-
 def build_pdf_actions_keyboard(user_id: int) -> InlineKeyboardMarkup:
     """Build PDF actions keyboard"""
     return InlineKeyboardMarkup([
@@ -218,17 +199,26 @@ async def handle_document(client: Client, message: Message):
             return
         
         # Add to batch
-        file_info = {
-            'file_id': file_id,
-            'file_name': file_name,
-            'is_video': False,
-            'message_id': message.id,
-            'size': doc.file_size
-        }
+        file_info = BatchFile(
+            file_id=file_id,
+            file_name=file_name,
+            message_id=message.id,
+            size=doc.file_size,
+            file_unique_id=doc.file_unique_id,
+        )
         user_batches[user_id].append(file_info)
         
         # Save to database
-        await db.add_batch_file(user_id, file_info)
+        await db.add_batch_file(user_id, file_info.to_doc())
+        
+        # Start fetching now so /process finds it already on disk; small
+        # files skip the disk entirely and are fetched in memory later
+        key = (user_id, file_id)
+        is_small = 0 < (doc.file_size or 0) <= BATCH_IN_MEMORY_MAX
+        if not is_small and key not in batch_downloads:
+            batch_downloads[key] = asyncio.create_task(
+                _prefetch_batch_file(client, user_id, file_info)
+            )
         
         await message.reply_text(
             f"✅ **File added to batch** ({len(user_batches[user_id])}/{MAX_BATCH_FILES})\n\n"
@@ -250,26 +240,59 @@ async def handle_document(client: Client, message: Message):
         reply_markup=keyboard
     )
 
+async def _prefetch_batch_file(client: Client, user_id: int, file_info: BatchFile) -> None:
+    """Download a batch file on ingest and remember its local path"""
+    try:
+        # Large files come in over parallel ranges; this is where nearly all
+        # batch downloads happen, the batch run only fetches what is missing
+        path = await fast_download(
+            client, file_info.file_id,
+            f"{get_user_temp_dir(user_id)}/batch_{file_info.message_id}.pdf", file_info.size
+        )
+        if path:
+            file_info.local_path = path
+            await db.set_batch_file_path(user_id, file_info.file_id, path)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prefetch failed for user {user_id}: {e}")
+
 # PDF processing functions
 
 async def _ensure_banner_pdf_path(user_id: int) -> Optional[str]:
     """Get user's banner PDF path, converting image to PDF if needed"""
     settings = await db.get_user_settings(user_id)
     banner_path = settings.get("banner_path")
-    
-    if not banner_path or not os.path.exists(banner_path):
+
+    if not banner_path:
         return None
-    
+
+    # One stat gives both existence and the mtime used as cache key
+    try:
+        mtime_ns = os.stat(banner_path).st_mtime_ns
+    except OSError:
+        _banner_pdf_cache.pop(banner_path, None)
+        return None
+
     if banner_path.lower().endswith(".pdf"):
         return banner_path
-    
+
+    # Reuse the previous conversion while the source image is unchanged
+    cached = _banner_pdf_cache.get(banner_path)
+    if cached and cached[0] == mtime_ns and os.path.exists(cached[1]):
+        return cached[1]
+
     # Convert image to PDF
     try:
-        out_pdf = BANNERS_DIR / (Path(banner_path).stem + ".pdf")
+        # Name the output after the full source path: two users' images
+        # sharing a stem must not overwrite each other's cached conversion
+        source_tag = hashlib.sha1(os.path.abspath(banner_path).encode()).hexdigest()[:12]
+        out_pdf = BANNERS_DIR / f"{Path(banner_path).stem}_{source_tag}.pdf"
         with Image.open(banner_path) as im:
             if im.mode in ("RGBA", "P"):
                 im = im.convert("RGB")
             im.save(out_pdf, "PDF", resolution=100.0)
+        _banner_pdf_cache[banner_path] = (mtime_ns, str(out_pdf))
         return str(out_pdf)
     except Exception as e:
         logger.error(f"Error converting banner to PDF: {e}")
@@ -278,61 +301,17 @@ async def _ensure_banner_pdf_path(user_id: int) -> Optional[str]:
 async def add_banner_pages_to_pdf(in_pdf: str, out_pdf: str, banner_pdf: str, place: str = "after"):
     """Add banner pages to PDF"""
     try:
-        with pikepdf.open(in_pdf) as pdf, pikepdf.open(banner_pdf) as banner:
-            banner_pages = list(banner.pages)
-            
-            if place in ("before", "both", None, ""):
-                for p in reversed(banner_pages):
-                    pdf.pages.insert(0, p)
-            
-            if place in ("after", "both"):
-                for p in banner_pages:
-                    pdf.pages.append(p)
-            
-            pdf.save(out_pdf)
+        # Same pool op as the batch: each worker keeps the banner it parsed
+        # open, so repeat uses of a banner skip re-reading it
+        await run_pdf_op(pdf_ops.add_banner, in_pdf, out_pdf, banner_pdf, place)
     except Exception as e:
         logger.error(f"Error adding banner: {e}")
         raise
 
-def lock_pdf_with_password(in_pdf: str, out_pdf: str, password: str):
-    """Lock PDF with password"""
-    try:
-        with pikepdf.open(in_pdf) as pdf:
-            enc = pikepdf.Encryption(user=password, owner=password, R=4)
-            pdf.save(out_pdf, encryption=enc)
-    except Exception as e:
-        logger.error(f"Error locking PDF: {e}")
-        raise
-
-def unlock_pdf(in_pdf: str, out_pdf: str, password: str):
-    """Unlock PDF with password"""
-    try:
-        with pikepdf.open(in_pdf, password=password) as pdf:
-            pdf.save(out_pdf)
-    except Exception as e:
-        logger.error(f"Error unlocking PDF: {e}")
-        raise
-
-def remove_pages_by_numbers(in_pdf: str, out_pdf: str, pages: List[int]):
-    """Remove specified pages from PDF"""
-    try:
-        with pikepdf.open(in_pdf) as pdf:
-            if not pages:
-                pdf.save(out_pdf)
-                return
-            
-            n = len(pdf.pages)
-            for p in sorted(set(pages), reverse=True):
-                if 1 <= p <= n:
-                    del pdf.pages[p - 1]
-            
-            if len(pdf.pages) == 0:
-                raise ValueError("All pages were removed")
-            
-            pdf.save(out_pdf)
-    except Exception as e:
-        logger.error(f"Error removing pages: {e}")
-        raise
+def count_pdf_pages(pdf_path: str) -> int:
+    """Return the page count (pikepdf opens lazily, so this is cheap)"""
+    with pikepdf.open(pdf_path) as pdf:
+        return len(pdf.pages)
 
 def extract_page_to_png(pdf_path: str, page_number: int, out_png: str, zoom: float = 2.0) -> str:
     """Extract a page from PDF as PNG image"""
@@ -417,57 +396,33 @@ async def process_full_pipeline(client: Client, chat_id: int, user_id: int, file
     session = ensure_session_dict(user_id)
     user_dir = get_user_temp_dir(user_id)
 
-    status = await client.send_message(chat_id, "⏳ Full Process in progress...")
+    status = await client.send_message(chat_id, "⏳ Full Process in progress...", parse_mode=ParseMode.DISABLED)
     try:
-        in_path = await client.download_media(file_id, file_name=user_dir / 'fullproc_input.pdf')
-        current = in_path
-
-        # 1) Unlock
-        if unlock_pw and unlock_pw.lower() != 'none':
-            tmp = str(user_dir / 'fullproc_unlocked.pdf')
-            with pikepdf.open(current, password=unlock_pw) as pdf:
-                pdf.save(tmp)
-            current = tmp
-
-        # 2) Clean banners
-        with open(current, 'rb') as f:
-            pdf_bytes = f.read()
-        cleaned = clean_pdf_banners(pdf_bytes, user_id)
-        tmp2 = str(user_dir / 'fullproc_cleaned.pdf')
-        with open(tmp2, 'wb') as f:
-            f.write(cleaned)
-        current = tmp2
-
-        # 3) Add banner (ensure exists or create default)
-        banner_pdf = await _ensure_banner_pdf_path(user_id)
+        # The banner lookup is independent of the file, so resolve it
+        # while the download is in flight
+        in_path, banner_pdf = await asyncio.gather(
+            client.download_media(file_id, file_name=user_dir / 'fullproc_input.pdf'),
+            _ensure_banner_pdf_path(user_id),
+        )
         if not banner_pdf:
-            banner_pdf = create_default_banner_pdf(user_id)
-        if banner_pdf:
-            tmp3 = str(user_dir / 'fullproc_bannered.pdf')
-            await add_banner_pages_to_pdf(current, tmp3, banner_pdf, place='after')
-            current = tmp3
-
-        # 4) Remove pages
-        if pages_to_remove:
-            tmp4 = str(user_dir / 'fullproc_paged.pdf')
-            remove_pages_by_numbers(current, tmp4, pages_to_remove)
-            current = tmp4
-
-        # 5) Lock
-        if lock_pw:
-            tmp5 = str(user_dir / 'fullproc_locked.pdf')
-            lock_pdf_with_password(current, tmp5, lock_pw)
-            current = tmp5
+            banner_pdf = await asyncio.to_thread(create_default_banner_pdf, user_id)
+
+        # Unlock -> clean banners -> add banner -> remove pages -> lock,
+        # the same pool op the batch Full Process uses
+        current = str(user_dir / 'fullproc_output.pdf')
+        if not await run_pdf_op(pdf_ops.full_process, in_path, current, unlock_pw, banner_pdf,
+                                split_pages_spec(pages_to_remove or ()), lock_pw, user_id):
+            raise ValueError("All pages were removed")
 
         # Send result
         final_name = build_final_filename(user_id, file_name)
         delay = session.get('delete_delay', 300)
         await send_and_delete(client, chat_id, current, final_name, delay_seconds=delay)
-        await status.edit_text("✅ Full Process done!")
+        await status.edit_text("✅ Full Process done!", parse_mode=ParseMode.DISABLED)
     except pikepdf.PasswordError:
-        await status.edit_text("❌ Incorrect password for unlocking.")
+        await status.edit_text("❌ Incorrect password for unlocking.", parse_mode=ParseMode.DISABLED)
     except Exception as e:
-        await status.edit_text(f"❌ Error: {e}")
+        await status.edit_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
 
 async def process_extract_page(client: Client, message: Message, user_id: int, page_number: int):
     """Download current PDF and send extracted page as image."""
@@ -482,15 +437,15 @@ async def process_extract_page(client: Client, message: Message, user_id: int, p
     status = await message.reply_text("⏳ Extracting page...")
     try:
         pdf_path = await client.download_media(file_id, file_name=user_dir / 'extract_input.pdf')
-        if is_pdf_locked(pdf_path):
+        if await asyncio.to_thread(is_pdf_locked, pdf_path):
             await status.edit_text("❌ PDF is locked. Unlock it first.")
             return
         out_path = str(user_dir / f"{Path(file_name).stem}_page_{page_number}.png")
-        extract_page_to_png(pdf_path, page_number, out_path, zoom=3.0)
+        await asyncio.to_thread(extract_page_to_png, pdf_path, page_number, out_path, 3.0)
         await client.send_photo(message.chat.id, out_path, caption=f"📌 Page {page_number} of {file_name}")
         await status.delete()
     except Exception as e:
-        await status.edit_text(f"❌ Error: {e}")
+        await status.edit_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
     finally:
         # best-effort cleanup
         try:
@@ -509,26 +464,35 @@ def _settings_keyboard(user_id: int, current_pos: str) -> InlineKeyboardMarkup:
         [InlineKeyboardButton("🔙 Back", callback_data="back_main")],
     ])
 
+# Quick pages keyboard layout per mode: rows of (label, callback prefix)
+_PAGES_QUICK_LAYOUTS = {
+    'pages': (
+        (("The First", "the_first"), ("The Last", "the_last")),
+        (("The Middle", "the_middle"),),
+        (("📝 Enter manually", "enter_manually"),),
+    ),
+    'both': (
+        (("The First", "both_first"), ("The Last", "both_last")),
+        (("The Middle", "both_middle"),),
+        (("📝 Enter manually", "both_manual"),),
+    ),
+    'full': (
+        (("The First", "full_first"), ("The Last", "full_last")),
+        (("The Middle", "full_middle"),),
+        (("None", "full_none"),),
+        (("📝 Enter manually", "full_manual"),),
+    ),
+}
+
 def _pages_quick_keyboard(user_id: int, mode: str = 'pages') -> InlineKeyboardMarkup:
     """Quick selection keyboard for pages/both/fullproc.
     mode in {'pages','both','full'} determines callback prefix.
     """
-    prefix = {
-        'pages': 'the',
-        'both': 'both',
-        'full': 'full',
-    }.get(mode, 'the')
-    rows = [
-        [
-            InlineKeyboardButton("The First", callback_data=f"{prefix}_first:{user_id}"),
-            InlineKeyboardButton("The Last", callback_data=f"{prefix}_last:{user_id}"),
-        ],
-        [InlineKeyboardButton("The Middle", callback_data=f"{prefix}_middle:{user_id}")],
-    ]
-    if mode == 'full':
-        rows.append([InlineKeyboardButton("None", callback_data=f"{prefix}_none:{user_id}")])
-    rows.append([InlineKeyboardButton("📝 Enter manually", callback_data=f"{ 'enter_manually' if mode=='pages' else prefix + '_manual'}:{user_id}")])
-    return InlineKeyboardMarkup(rows)
+    layout = _PAGES_QUICK_LAYOUTS.get(mode, _PAGES_QUICK_LAYOUTS['pages'])
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(label, callback_data=f"{action}:{user_id}") for label, action in row]
+        for row in layout
+    ])
 
 
 # Process individual PDF operations
@@ -551,7 +515,7 @@ async def process_unlock(client: Client, message: Message, user_id: int, passwor
         out_path = str(user_dir / f"unlocked_{file_name}")
         
         # Unlock PDF
-        unlock_pdf(in_path, out_path, password)
+        await run_pdf_op(pdf_ops.unlock, in_path, out_path, password)
         
         # Send unlocked file
         cleaned_name = build_final_filename(user_id, file_name)
@@ -563,7 +527,7 @@ async def process_unlock(client: Client, message: Message, user_id: int, passwor
     except pikepdf.PasswordError:
         await message.reply_text("❌ Incorrect password")
     except Exception as e:
-        await message.reply_text(f"❌ Error: {e}")
+        await message.reply_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
     finally:
         clear_processing_flag(user_id, "unlock", "completed")
 
@@ -591,7 +555,8 @@ async def process_pages(client: Client, message: Message, user_id: int, pages_sp
         out_path = str(user_dir / f"pages_{file_name}")
         
         # Remove pages
-        remove_pages_by_numbers(in_path, out_path, pages)
+        if not await run_pdf_op(pdf_ops.remove_pages, in_path, out_path, split_pages_spec(pages)):
+            raise ValueError("All pages were removed")
         
         # Send processed file
         cleaned_name = build_final_filename(user_id, file_name)
@@ -601,7 +566,7 @@ async def process_pages(client: Client, message: Message, user_id: int, pages_sp
         await message.reply_text(MESSAGES['success_pages'])
         
     except Exception as e:
-        await message.reply_text(f"❌ Error: {e}")
+        await message.reply_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
     finally:
         clear_processing_flag(user_id, "pages", "completed")
 
@@ -640,7 +605,7 @@ async def process_add_banner(client: Client, message: Message, user_id: int):
         await message.reply_text("✅ Banner added successfully!")
         
     except Exception as e:
-        await status.edit_text(f"❌ Error: {e}")
+        await status.edit_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
     finally:
         clear_processing_flag(user_id, "add_banner", "completed")
 
@@ -671,7 +636,7 @@ async def process_lock(client: Client, message: Message, user_id: int):
         out_path = str(user_dir / f"locked_{file_name}")
         
         # Lock PDF
-        lock_pdf_with_password(in_path, out_path, password)
+        await run_pdf_op(pdf_ops.lock, in_path, out_path, password)
         
         # Send locked file
         cleaned_name = build_final_filename(user_id, file_name)
@@ -682,7 +647,7 @@ async def process_lock(client: Client, message: Message, user_id: int):
         await message.reply_text("✅ PDF locked successfully!")
         
     except Exception as e:
-        await status.edit_text(f"❌ Error: {e}")
+        await status.edit_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
     finally:
         clear_processing_flag(user_id, "lock", "completed")
 
@@ -741,8 +706,6 @@ async def status_handler(client: Client, message: Message):
     user_count = await db.count_users()
     stats = await db.get_stats()
     
-    from utils.helpers import format_bytes, format_uptime
-    
     uptime = format_uptime(time.time() - START_TS)
     
     text = (
@@ -838,8 +801,8 @@ async def back_main_cb(client: Client, query: CallbackQuery):
 
 @Client.on_callback_query(filters.regex(r"^(rename_file|unlock|pages|both|fullproc|add_banner|lock_now|cancel):(\d+)$"))
 async def pdf_actions_cb(client: Client, query: CallbackQuery):
-    data = query.data
-    action, uid = data.split(":", 1)
+    # The handler regex already captured the fields
+    action, uid = query.matches[0].groups()
     user_id = int(uid)
 
     # Verify user
@@ -1040,11 +1003,10 @@ async def handle_text_flows(client: Client, message: Message):
         pages_list = session.pop('fullproc_pages_list', None)
         if pages_list is None:
             pages_text = session.pop('fullproc_pages', 'none')
-            from utils.helpers import parse_pages_spec
-            pages_to_remove = [] if pages_text.strip().lower() in {'none', 'no', 'skip', '0'} else list(parse_pages_spec(pages_text))
+            pages_to_remove = [] if pages_text.strip().lower() in NO_PAGES_ALIASES else list(parse_pages_spec(pages_text))
         else:
             pages_to_remove = list(pages_list)
-        if lock_pw.lower() in {'skip', 'none', 'no'}:
+        if lock_pw.lower() in SKIP_ALIASES:
             lock_pw = ''
         file_id = session.get('file_id')
         file_name = session.get('file_name', 'document.pdf')
@@ -1107,11 +1069,10 @@ async def cb_the_last(client: Client, query: CallbackQuery):
     user_dir = get_user_temp_dir(user_id)
     path = await client.download_media(file_id, file_name=user_dir / 'quick_last.pdf')
     try:
-        with pikepdf.open(path) as pdf:
-            last = len(pdf.pages)
+        last = await asyncio.to_thread(count_pdf_pages, path)
         await process_pages(client, query.message, user_id, str(last))
     except Exception as e:
-        await query.edit_message_text(f"❌ Error: {e}")
+        await query.edit_message_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
 
 @Client.on_callback_query(filters.regex(r"^the_middle:(\d+)$"))
 async def cb_the_middle(client: Client, query: CallbackQuery):
@@ -1128,12 +1089,11 @@ async def cb_the_middle(client: Client, query: CallbackQuery):
     user_dir = get_user_temp_dir(user_id)
     path = await client.download_media(file_id, file_name=user_dir / 'quick_middle.pdf')
     try:
-        with pikepdf.open(path) as pdf:
-            total = len(pdf.pages)
-            middle = max(1, total // 2)
+        total = await asyncio.to_thread(count_pdf_pages, path)
+        middle = max(1, total // 2)
         await process_pages(client, query.message, user_id, str(middle))
     except Exception as e:
-        await query.edit_message_text(f"❌ Error: {e}")
+        await query.edit_message_text(f"❌ Error: {e}", parse_mode=ParseMode.DISABLED)
 
 @Client.on_callback_query(filters.regex(r"^enter_manually:(\d+)$"))
 async def cb_enter_manually(client: Client, query: CallbackQuery):
@@ -1149,13 +1109,12 @@ async def cb_enter_manually(client: Client, query: CallbackQuery):
 # The Both quick pages
 @Client.on_callback_query(filters.regex(r"^both_(first|last|middle|manual):(\d+)$"))
 async def cb_both_quick(client: Client, query: CallbackQuery):
-    action, uid = query.data.split(":", 1)
+    kind, uid = query.matches[0].groups()
     user_id = int(uid)
     if query.from_user.id != user_id:
         await query.answer("❌ This is not for you!", show_alert=True)
         return
     await query.answer()
-    kind = action.split("_", 1)[1]
     session = ensure_session_dict(user_id)
     if kind == 'manual':
         session['awaiting_both_pages'] = True
@@ -1176,16 +1135,14 @@ async def cb_both_quick(client: Client, query: CallbackQuery):
             await query.edit_message_text("❌ No PDF in session")
             return
         path = await client.download_media(file_id, file_name=get_user_temp_dir(user_id) / 'both_last.pdf')
-        with pikepdf.open(path) as pdf:
-            pages = str(len(pdf.pages))
+        pages = str(await asyncio.to_thread(count_pdf_pages, path))
     else:
         file_id = session.get('file_id')
         if not file_id:
             await query.edit_message_text("❌ No PDF in session")
             return
         path = await client.download_media(file_id, file_name=get_user_temp_dir(user_id) / 'both_middle.pdf')
-        with pikepdf.open(path) as pdf:
-            pages = str(max(1, len(pdf.pages) // 2))
+        pages = str(max(1, await asyncio.to_thread(count_pdf_pages, path) // 2))
     password = session.get('both_password', '')
     await process_unlock(client, query.message, user_id, password)
     await process_pages(client, query.message, user_id, pages)
@@ -1193,13 +1150,12 @@ async def cb_both_quick(client: Client, query: CallbackQuery):
 # Full Process quick pages
 @Client.on_callback_query(filters.regex(r"^full_(first|last|middle|none|manual):(\d+)$"))
 async def cb_full_quick(client: Client, query: CallbackQuery):
-    action, uid = query.data.split(":", 1)
+    kind, uid = query.matches[0].groups()
     user_id = int(uid)
     if query.from_user.id != user_id:
         await query.answer("❌ This is not for you!", show_alert=True)
         return
     await query.answer()
-    kind = action.split("_", 1)[1]
     session = ensure_session_dict(user_id)
     if 'fullproc_password' not in session and kind != 'manual':
         session['awaiting_fullproc_password'] = True
@@ -1222,13 +1178,13 @@ async def cb_full_quick(client: Client, query: CallbackQuery):
             await query.edit_message_text("❌ No PDF in session")
             return
         path = await client.download_media(file_id, file_name=get_user_temp_dir(user_id) / f'full_{kind}.pdf')
-        with pikepdf.open(path) as pdf:
-            if kind == 'first':
-                pages_to_remove = [1]
-            elif kind == 'last':
-                pages_to_remove = [len(pdf.pages)]
-            else:
-                pages_to_remove = [max(1, len(pdf.pages) // 2)]
+        total = await asyncio.to_thread(count_pdf_pages, path)
+        if kind == 'first':
+            pages_to_remove = [1]
+        elif kind == 'last':
+            pages_to_remove = [total]
+        else:
+            pages_to_remove = [max(1, total // 2)]
     unlock_pw = session.get('fullproc_password', '')
     # Ask for lock password and then execute
     session['fullproc_pages_list'] = pages_to_remove
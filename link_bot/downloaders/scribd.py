@@ -2,19 +2,23 @@
 Scribd document downloader for PDF Bot
 Handles downloading documents from Scribd links
 """
+import io
+import asyncio
 import os
+import re
 import subprocess
 import logging
 import tempfile
 from pathlib import Path
 from typing import Optional, List, Tuple
 
+from PIL import Image
 from pyrogram import Client, filters
 from pyrogram.types import Message, CallbackQuery
 from pyrogram.enums import ParseMode
 
 from utils.database import db
-from utils.sessions import ensure_session_dict
+from utils.sessions import sessions, ensure_session_dict
 from utils.helpers import get_user_temp_dir
 from link_bot.admin import is_user_in_channel, send_force_join_message
 
@@ -24,9 +28,20 @@ logger = logging.getLogger(__name__)
 DOWNLOADS_DIR = Path("downloads")
 DOWNLOADS_DIR.mkdir(exist_ok=True)
 
+# URL keyword patterns, compiled once (IGNORECASE avoids lowering a copy)
+_SCRIBD_RE = re.compile(r"scribd\.com", re.IGNORECASE)
+_COMIC_RE = re.compile(r"comic|manga|webtoon", re.IGNORECASE)
+
+# Only dispatch text to the URL handler while a link is actually awaited
+_awaiting_download_url = filters.create(
+    lambda _, __, m: bool(
+        m.from_user and sessions.get(m.from_user.id, {}).get('awaiting_download_url')
+    )
+)
+
 def is_scribd_url(url: str) -> bool:
     """Check if URL is from Scribd"""
-    return "scribd.com" in url.lower()
+    return _SCRIBD_RE.search(url) is not None
 
 async def download_from_scribd(url: str, output_dir: str = "downloads") -> Optional[str]:
     """
@@ -149,8 +164,6 @@ async def download_from_scribd_playwright(url: str, output_dir: str = "downloads
             if not elements:
                 logger.error("No page-like elements found; falling back to full-page screenshot")
                 # Full page screenshot fallback -> single-page PDF
-                from PIL import Image
-                import io
                 shot = await page.screenshot(full_page=True)
                 img = Image.open(io.BytesIO(shot)).convert("RGB")
                 img.save(output_path, "PDF", resolution=100.0)
@@ -159,8 +172,6 @@ async def download_from_scribd_playwright(url: str, output_dir: str = "downloads
                 return str(output_path)
 
             # Screenshot each element
-            from PIL import Image
-            import io
             images = []
             for idx, (elem, _) in enumerate(elements):
                 try:
@@ -222,21 +233,16 @@ async def download_link_callback(client: Client, query: CallbackQuery):
         parse_mode=ParseMode.MARKDOWN
     )
 
-@Client.on_message(filters.text & filters.private)
+@Client.on_message(filters.text & filters.private & _awaiting_download_url)
 async def handle_download_url(client: Client, message: Message):
     """Handle URL download requests"""
     user_id = message.from_user.id
     session = ensure_session_dict(user_id)
-    
-    # Check if awaiting download URL
-    if not session.get('awaiting_download_url'):
-        return
-    
     session.pop('awaiting_download_url', None)
     url = message.text.strip()
     
     # Basic URL validation
-    if not (url.startswith('http://') or url.startswith('https://')):
+    if not url.startswith(('http://', 'https://')):
         await message.reply_text("❌ Please send a valid URL starting with http:// or https://")
         return
     
@@ -250,14 +256,13 @@ async def handle_download_url(client: Client, message: Message):
         await message.reply_text("📥 Downloading...")
         local_path = await download_document(url, user_id)
         if local_path and os.path.exists(local_path):
-            with open(local_path, 'rb') as f:
-                await client.send_document(
-                    chat_id=message.chat.id,
-                    document=f,
-                    caption="📄 Downloaded document"
-                )
+            await client.send_document(
+                chat_id=message.chat.id,
+                document=local_path,
+                caption="📄 Downloaded document"
+            )
             try:
-                os.remove(local_path)
+                await asyncio.to_thread(os.remove, local_path)
             except Exception:
                 pass
             return
@@ -296,12 +301,11 @@ async def handle_scribd_download(client: Client, message: Message, url: str):
         # Send the downloaded file
         await status.edit_text("📤 Sending document...")
         
-        with open(file_path, 'rb') as f:
-            await client.send_document(
-                message.chat.id,
-                document=f,
-                caption=f"📄 Scribd Document\n🔗 {url[:50]}{'...' if len(url) > 50 else ''}"
-            )
+        await client.send_document(
+            message.chat.id,
+            document=file_path,
+            caption=f"📄 Scribd Document\n🔗 {url[:50]}{'...' if len(url) > 50 else ''}"
+        )
         
         # Update stats
         file_size = os.path.getsize(file_path)
@@ -309,7 +313,7 @@ async def handle_scribd_download(client: Client, message: Message, url: str):
         
         # Clean up
         try:
-            os.remove(file_path)
+            await asyncio.to_thread(os.remove, file_path)
         except Exception:
             pass
         
@@ -374,7 +378,7 @@ try:
         url = message.text.strip()
         
         # Check if it's a comic/manga on Scribd
-        if any(word in url.lower() for word in ['comic', 'manga', 'webtoon']):
+        if _COMIC_RE.search(url):
             try:
                 # Use manga handler for comics
                 await process_manga_url(client, message.chat.id, user_id, url, then_edit=False)
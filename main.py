@@ -3,13 +3,15 @@ Main entry point for PDF Bot (Pyrogram + plugins) with robust startup/idle.
 """
 import os
 import sys
+import time
 import asyncio
 import logging
 from pathlib import Path
 
 from pyrogram import Client, idle, filters
 from utils.database import db
-from config import API_ID, API_HASH, BOT_TOKEN, ADMIN_IDS
+from utils.pdf_ops import shutdown_pdf_pool
+from config import API_ID, API_HASH, BOT_TOKEN, ADMIN_IDS, MAX_CONCURRENT_TRANSMISSIONS
 
 # Configure logging
 logging.basicConfig(
@@ -40,6 +42,7 @@ app = Client(
     api_id=API_ID,
     api_hash=API_HASH,
     bot_token=BOT_TOKEN,
+    max_concurrent_transmissions=MAX_CONCURRENT_TRANSMISSIONS,
 )
 
 # Explicitly import handlers to rule out plugin loader issues
@@ -47,6 +50,11 @@ from link_bot import core as _core_handlers  # noqa: F401
 from link_bot import admin as _admin_handlers  # noqa: F401
 from link_bot import batch as _batch_handlers  # noqa: F401
 from link_bot import debug_echo as _debug_handlers  # noqa: F401
+from link_bot.admin import resume_broadcasts
+from link_bot.batch import sweep_batch_prefetches
+
+# Long-running startup tasks, referenced until shutdown cancels them
+_background_tasks = []
 
 async def startup():
     """Startup tasks (after app.start())."""
@@ -93,39 +101,81 @@ async def startup():
             logger.error(f"Startup ping failed for {aid}: {e}")
 
     # Start periodic cleanup
-    asyncio.create_task(cleanup_temp_files())
+    _background_tasks.append(asyncio.create_task(cleanup_temp_files()))
     logger.info("✅ Cleanup task started")
+
+    # Pick up broadcasts interrupted by the previous shutdown
+    _background_tasks.append(asyncio.create_task(resume_broadcasts(app)))
     logger.info("🟢 Bot is ready! Send /start in DM.")
 
+# Sweep through one directory fd where the platform supports it so the
+# per-file stat/unlink resolve relative to the open dir (fstatat/unlinkat)
+# instead of re-walking the full path each time
+_USE_DIR_FD = (
+    os.scandir in os.supports_fd
+    and os.stat in os.supports_dir_fd
+    and os.unlink in os.supports_dir_fd
+)
+
+def _sweep_user_dir(path: str, now: float, max_age: float):
+    """Delete files older than max_age directly inside path"""
+    if not _USE_DIR_FD:
+        with os.scandir(path) as files:
+            for file in files:
+                if not file.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    if now - file.stat(follow_symlinks=False).st_mtime > max_age:
+                        os.unlink(file.path)
+                        logger.debug(f"Deleted old file: {file.path}")
+                except Exception:
+                    pass
+        return
+
+    dfd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        with os.scandir(dfd) as files:
+            for file in files:
+                if not file.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    if now - file.stat(follow_symlinks=False).st_mtime > max_age:
+                        os.unlink(file.name, dir_fd=dfd)
+                        logger.debug(f"Deleted old file: {os.path.join(path, file.name)}")
+                except Exception:
+                    pass
+    finally:
+        os.close(dfd)
+
 async def cleanup_temp_files():
     """Periodically clean temporary files"""
     while True:
+        try:
+            # Prefetches of abandoned batches first, so their files go now
+            await sweep_batch_prefetches()
+        except Exception as e:
+            logger.error(f"Batch prefetch sweep error: {e}")
+        
         try:
             # Clean files older than 2 hours
-            import time
             now = time.time()
             max_age = 2 * 60 * 60  # 2 hours
             
-            for user_dir in TEMP_DIR.iterdir():
-                if not user_dir.is_dir():
-                    continue
-                
-                for file in user_dir.iterdir():
-                    if file.is_file():
-                        age = now - file.stat().st_mtime
-                        if age > max_age:
-                            try:
-                                file.unlink()
-                                logger.debug(f"Deleted old file: {file}")
-                            except Exception:
-                                pass
-                
-                # Remove empty directories
-                try:
-                    if not any(user_dir.iterdir()):
-                        user_dir.rmdir()
-                except Exception:
-                    pass
+            # scandir exposes d_type and caches stat results per DirEntry,
+            # so no extra stat() is issued for the is_dir/is_file checks
+            with os.scandir(TEMP_DIR) as user_dirs:
+                for user_dir in user_dirs:
+                    if not user_dir.is_dir(follow_symlinks=False):
+                        continue
+
+                    _sweep_user_dir(user_dir.path, now, max_age)
+
+                    # Remove empty directories; rmdir refuses non-empty
+                    # ones itself, so no listing is needed to check
+                    try:
+                        os.rmdir(user_dir.path)
+                    except OSError:
+                        pass
                     
         except Exception as e:
             logger.error(f"Cleanup error: {e}")
@@ -137,10 +187,18 @@ async def shutdown():
     """Shutdown tasks"""
     logger.info("📴 Shutting down PDF Bot...")
     
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    
     # Disconnect from MongoDB
     await db.disconnect()
     logger.info("✅ MongoDB disconnected")
     
+    # Stop the PDF worker processes
+    await asyncio.to_thread(shutdown_pdf_pool)
+    logger.info("✅ PDF pool stopped")
+    
     logger.info("👋 Goodbye!")
 
 async def runner():
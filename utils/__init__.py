@@ -5,11 +5,18 @@ import re
 from urllib.parse import urlparse
 
 
+_URL_PREFIXES = ("http://", "https://")
+
+
 def is_valid_url(text: str) -> bool:
     if not isinstance(text, str) or not text:
         return False
+    text = text.strip()
+    # Cheap prefix gate so plain chat text never reaches urlparse
+    if not text[:8].lower().startswith(_URL_PREFIXES):
+        return False
     try:
-        parsed = urlparse(text.strip())
+        parsed = urlparse(text)
         return parsed.scheme in {"http", "https"} and bool(parsed.netloc)
     except Exception:
         return False
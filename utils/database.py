@@ -2,6 +2,7 @@
 MongoDB database management for PDF Bot
 """
 import motor.motor_asyncio
+from pymongo import ReturnDocument
 from typing import Optional, Dict, List, Any
 import logging
 from datetime import datetime, timedelta
@@ -41,6 +42,13 @@ class MongoDB:
         await self.db.batch_files.create_index('user_id')
         await self.db.batch_files.create_index('created_at')
 
+        # Processed-result cache; Telegram file_ids are not kept forever,
+        # so entries expire after a week
+        await self.db.result_cache.create_index(
+            [('unique_id', 1), ('op', 1), ('params', 1)], unique=True
+        )
+        await self.db.result_cache.create_index('created_at', expireAfterSeconds=7 * 24 * 3600)
+
         # Messages and files collections
         try:
             await self.db.messages.create_index([('user_id', 1), ('date', -1)])
@@ -51,6 +59,10 @@ class MongoDB:
         except Exception:
             pass
         
+        # Broadcast delivery tracking
+        await self.db.broadcast_targets.create_index([('broadcast_id', 1), ('status', 1)])
+        await self.db.broadcast_targets.create_index([('broadcast_id', 1), ('user_id', 1)], unique=True)
+        
     async def disconnect(self):
         """Disconnect from MongoDB"""
         if self.client:
@@ -67,7 +79,9 @@ class MongoDB:
                 {
                     '$set': {
                         'user_id': user_id,
-                        'last_seen': datetime.now()
+                        'last_seen': datetime.now(),
+                        # Any interaction means broadcasts reach them again
+                        'blocked': False
                     },
                     '$setOnInsert': {
                         'created_at': datetime.now(),
@@ -118,16 +132,20 @@ class MongoDB:
         return await self.db.users.find_one({'user_id': user_id})
     
     async def count_users(self) -> int:
-        """Count total users"""
-        return await self.db.users.count_documents({})
+        """Count total users (from collection metadata, no scan)"""
+        return await self.db.users.estimated_document_count()
     
-    async def get_all_users(self) -> List[int]:
-        """Get all user IDs"""
-        cursor = self.db.users.find({}, {'user_id': 1})
-        users = []
-        async for doc in cursor:
-            users.append(doc['user_id'])
-        return users
+    async def mark_user_blocked(self, user_id: int) -> bool:
+        """Flag a user that can no longer be messaged (blocked/deleted)"""
+        try:
+            await self.db.users.update_one(
+                {'user_id': user_id},
+                {'$set': {'blocked': True, 'blocked_at': datetime.now()}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error marking user {user_id} blocked: {e}")
+            return False
     
     # ========== User Settings ==========
     
@@ -184,6 +202,18 @@ class MongoDB:
             files.append(doc)
         return files
     
+    async def set_batch_file_path(self, user_id: int, file_id: str, local_path: str) -> bool:
+        """Record where a batch file was prefetched to"""
+        try:
+            await self.db.batch_files.update_many(
+                {'user_id': user_id, 'file_id': file_id},
+                {'$set': {'local_path': local_path}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error updating batch file path: {e}")
+            return False
+    
     async def clear_batch(self, user_id: int) -> bool:
         """Clear user's batch"""
         try:
@@ -193,6 +223,43 @@ class MongoDB:
             logger.error(f"Error clearing batch: {e}")
             return False
     
+    # ========== Result Cache ==========
+    
+    async def get_cached_result(self, unique_id: str, op: str, params_hash: str) -> Optional[str]:
+        """file_id of an earlier upload of the same file, op and params"""
+        try:
+            doc = await self.db.result_cache.find_one(
+                {'unique_id': unique_id, 'op': op, 'params': params_hash}
+            )
+            return doc['file_id'] if doc else None
+        except Exception as e:
+            logger.error(f"Error reading result cache: {e}")
+            return None
+    
+    async def put_cached_result(self, unique_id: str, op: str, params_hash: str, file_id: str) -> bool:
+        """Remember the file_id Telegram gave a processed result"""
+        try:
+            await self.db.result_cache.update_one(
+                {'unique_id': unique_id, 'op': op, 'params': params_hash},
+                {'$set': {'file_id': file_id, 'created_at': datetime.now()}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error writing result cache: {e}")
+            return False
+    
+    async def drop_cached_result(self, unique_id: str, op: str, params_hash: str) -> bool:
+        """Forget a cached result whose file_id stopped working"""
+        try:
+            await self.db.result_cache.delete_one(
+                {'unique_id': unique_id, 'op': op, 'params': params_hash}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error dropping cached result: {e}")
+            return False
+    
     # ========== Force Join Channels ==========
     
     async def get_forced_channels(self) -> List[str]:
@@ -202,19 +269,19 @@ class MongoDB:
             return doc.get('channels', [])
         return []
     
+    @staticmethod
+    def _clean_channels(channels: List[str]) -> List[str]:
+        """Strip @/# prefixes and drop empties and duplicates, keeping order"""
+        return list(dict.fromkeys(
+            c for c in (str(ch).strip().lstrip('@#') for ch in channels) if c
+        ))
+    
     async def set_forced_channels(self, channels: List[str]) -> bool:
         """Set forced subscription channels"""
         try:
-            # Clean channel names
-            clean_channels = []
-            for ch in channels:
-                c = str(ch).strip().lstrip('@').lstrip('#')
-                if c and c not in clean_channels:
-                    clean_channels.append(c)
-            
             await self.db.config.update_one(
                 {'_id': 'force_join'},
-                {'$set': {'channels': clean_channels, 'updated_at': datetime.now()}},
+                {'$set': {'channels': self._clean_channels(channels), 'updated_at': datetime.now()}},
                 upsert=True
             )
             return True
@@ -224,23 +291,102 @@ class MongoDB:
     
     async def add_forced_channels(self, channels: List[str]) -> List[str]:
         """Add channels to forced subscription list"""
-        current = await self.get_forced_channels()
-        for ch in channels:
-            c = str(ch).strip().lstrip('@').lstrip('#')
-            if c and c not in current:
-                current.append(c)
-        await self.set_forced_channels(current)
-        return current
+        # One atomic round-trip instead of read-modify-write
+        doc = await self.db.config.find_one_and_update(
+            {'_id': 'force_join'},
+            {
+                '$addToSet': {'channels': {'$each': self._clean_channels(channels)}},
+                '$set': {'updated_at': datetime.now()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc.get('channels', []) if doc else []
     
     async def remove_forced_channels(self, channels: List[str]) -> List[str]:
         """Remove channels from forced subscription list"""
-        current = await self.get_forced_channels()
-        for ch in channels:
-            c = str(ch).strip().lstrip('@').lstrip('#')
-            if c in current:
-                current.remove(c)
-        await self.set_forced_channels(current)
-        return current
+        doc = await self.db.config.find_one_and_update(
+            {'_id': 'force_join'},
+            {
+                '$pullAll': {'channels': self._clean_channels(channels)},
+                '$set': {'updated_at': datetime.now()}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        return doc.get('channels', []) if doc else []
+    
+    # ========== Broadcasts ==========
+    
+    async def create_broadcast(self, text: str, chat_id: int) -> Any:
+        """Persist a broadcast and snapshot its recipients as pending targets"""
+        result = await self.db.broadcasts.insert_one({
+            'text': text,
+            'chat_id': chat_id,
+            'status': 'running',
+            'created_at': datetime.now()
+        })
+        broadcast_id = result.inserted_id
+        
+        # Copy recipients server-side; nothing is streamed through the bot
+        await self.db.users.aggregate([
+            {'$match': {'blocked': {'$ne': True}}},
+            {'$project': {
+                '_id': 0,
+                'user_id': 1,
+                'broadcast_id': {'$literal': broadcast_id},
+                'status': {'$literal': 'pending'}
+            }},
+            {'$merge': {
+                'into': 'broadcast_targets',
+                'on': ['broadcast_id', 'user_id'],
+                'whenMatched': 'keepExisting'
+            }}
+        ]).to_list(None)
+        return broadcast_id
+    
+    def get_pending_targets_cursor(self, broadcast_id):
+        """Stream recipients of a broadcast that have not been handled yet"""
+        return self.db.broadcast_targets.find(
+            {'broadcast_id': broadcast_id, 'status': 'pending'},
+            {'user_id': 1, '_id': 0}
+        ).batch_size(1000)
+    
+    async def count_pending_targets(self, broadcast_id) -> int:
+        return await self.db.broadcast_targets.count_documents(
+            {'broadcast_id': broadcast_id, 'status': 'pending'}
+        )
+    
+    async def set_target_status(self, broadcast_id, user_id: int, status: str) -> bool:
+        """Record the outcome ('sent' or 'failed') for one recipient"""
+        try:
+            await self.db.broadcast_targets.update_one(
+                {'broadcast_id': broadcast_id, 'user_id': user_id},
+                {'$set': {'status': status}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error updating broadcast target {user_id}: {e}")
+            return False
+    
+    async def finish_broadcast(self, broadcast_id) -> Dict[str, int]:
+        """Mark a broadcast done, drop its targets and return per-status counts"""
+        counts = {}
+        async for doc in self.db.broadcast_targets.aggregate([
+            {'$match': {'broadcast_id': broadcast_id}},
+            {'$group': {'_id': '$status', 'n': {'$sum': 1}}}
+        ]):
+            counts[doc['_id']] = doc['n']
+        await self.db.broadcasts.update_one(
+            {'_id': broadcast_id},
+            {'$set': {'status': 'done', 'counts': counts, 'finished_at': datetime.now()}}
+        )
+        await self.db.broadcast_targets.delete_many({'broadcast_id': broadcast_id})
+        return counts
+    
+    async def get_unfinished_broadcasts(self) -> List[Dict]:
+        """Broadcasts interrupted by a restart, oldest first"""
+        cursor = self.db.broadcasts.find({'status': 'running'}).sort('created_at', 1)
+        return [doc async for doc in cursor]
     
     # ========== Statistics ==========
     
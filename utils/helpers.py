@@ -2,11 +2,14 @@
 Helper functions for PDF Bot
 Common utilities used across all modules
 """
+import io
 import os
 import re
 import tempfile
 import asyncio
 import logging
+import mimetypes
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime
@@ -17,9 +20,18 @@ logger = logging.getLogger(__name__)
 TEMP_DIR = Path("temp_files")
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Replies meaning "no pages" / "skip this step" in the text flows
+NO_PAGES_ALIASES = frozenset({"none", "0", "no", "non", "skip"})
+SKIP_ALIASES = frozenset({"skip", "none", "no"})
+
+@lru_cache(maxsize=4096)
+def _user_temp_path(user_id: int) -> Path:
+    return TEMP_DIR / str(user_id)
+
 def get_user_temp_dir(user_id: int) -> Path:
     """Get or create user's temporary directory"""
-    user_dir = TEMP_DIR / str(user_id)
+    user_dir = _user_temp_path(user_id)
+    # Still mkdir every time: the cleanup task removes emptied dirs
     user_dir.mkdir(exist_ok=True)
     return user_dir
 
@@ -56,7 +68,6 @@ def clean_filename(filename: str) -> str:
 
 def clean_caption_with_username(original_caption: str, user_id: int = None) -> str:
     """Clean caption and add user's saved username"""
-    from utils.sessions import sessions
     # Avoid synchronous DB calls here; rely on session data only
 
     cleaned = re.sub(r"@[^\s]+", "", original_caption or "").strip()
@@ -65,6 +76,7 @@ def clean_caption_with_username(original_caption: str, user_id: int = None) -> s
     if not user_id:
         return cleaned
 
+    from utils.sessions import sessions
     session = sessions.get(user_id, {})
     username = session.get('username')
 
@@ -112,14 +124,13 @@ def is_pdf_file(filename: str) -> bool:
 
 def is_supported_video(filename: str) -> bool:
     """Check if file is a supported video"""
-    import mimetypes
     mimetype, _ = mimetypes.guess_type(filename)
     return mimetype and mimetype.startswith("video/")
 
 def parse_pages_spec(spec: str) -> List[int]:
     """Parse page specification string (e.g., '1,3-5,7')"""
     spec = (spec or "").strip().lower()
-    if not spec or spec in {"none", "0", "no", "non", "skip"}:
+    if not spec or spec in NO_PAGES_ALIASES:
         return []
     
     pages: Set[int] = set()
@@ -151,18 +162,20 @@ def parse_pages_text(text: str) -> Tuple[List[int], Optional[str]]:
         return [], "Invalid format. Use numbers, commas and dashes (e.g. 1,3-5)."
     
     pages = parse_pages_spec(spec)
-    if not pages and spec and spec not in {"0", "none", "no", "non", "skip"}:
+    if not pages and spec and spec not in NO_PAGES_ALIASES:
         return [], "No valid pages found. Example: 1,3-5"
     
     return pages, None
 
+_BYTE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
 def format_bytes(n: int) -> str:
     """Format bytes to human readable string"""
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if n < 1024:
-            return f"{n:.2f} {unit}"
-        n /= 1024
-    return f"{n:.2f} PB"
+    if n < 1024:
+        return f"{n:.2f} B"
+    # Each unit is 2**10 of the previous one, so the bit length picks it
+    i = min((int(n).bit_length() - 1) // 10, len(_BYTE_UNITS) - 1)
+    return f"{n / (1 << (i * 10)):.2f} {_BYTE_UNITS[i]}"
 
 def format_uptime(seconds: float) -> str:
     """Format seconds to uptime string"""
@@ -171,50 +184,88 @@ def format_uptime(seconds: float) -> str:
     m, s = divmod(r, 60)
     return f"{h:02d}h{m:02d}m{s:02d}s"
 
+# Pending auto-deletes; the loop only holds tasks weakly, so keep them here
+# until they finish or a timer could be collected before it fires
+_delete_tasks: Set[asyncio.Task] = set()
+
+def _schedule_delete(sent, delay_seconds: int, file_path=None):
+    """Delete the sent message, and the local file if any, after a delay"""
+    async def delete_after_delay():
+        await asyncio.sleep(delay_seconds)
+        try:
+            await sent.delete()
+            logger.info(f"Message deleted after {delay_seconds}s")
+        except Exception as e:
+            logger.error(f"Error deleting message: {e}")
+        
+        # Delete local file
+        if file_path is None:
+            return
+        try:
+            await asyncio.to_thread(os.remove, file_path)
+            logger.info(f"Local file deleted: {file_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting file: {e}")
+    
+    task = asyncio.create_task(delete_after_delay())
+    _delete_tasks.add(task)
+    task.add_done_callback(_delete_tasks.discard)
+
 async def send_and_delete(client, chat_id: int, file_path: str, file_name: str, 
                           caption: str = None, delay_seconds: int = 300):
-    """Send document and auto-delete after delay"""
+    """Send document and auto-delete after delay.
+    
+    file_path may also be an in-memory BytesIO, which has no local file to remove.
+    Returns the sent message.
+    """
+    in_memory = isinstance(file_path, io.BytesIO)
     try:
-        # Send document
-        with open(file_path, 'rb') as f:
-            sent = await client.send_document(
-                chat_id,
-                document=f,
-                file_name=file_name,
-                caption=caption or ""
-            )
+        # Send document by path so Pyrogram streams it in chunks itself
+        sent = await client.send_document(
+            chat_id,
+            document=file_path if in_memory else str(file_path),
+            file_name=file_name,
+            caption=caption or ""
+        )
         
         logger.info(f"✅ Document sent: {file_name}")
         
         # Update stats
+        if in_memory:
+            file_size = file_path.getbuffer().nbytes
+        else:
+            try:
+                file_size = os.stat(file_path).st_size
+            except OSError:
+                file_size = 0
         from utils.database import db
-        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
         await db.bump_stats(file_size)
         
         # Schedule deletion
         if delay_seconds > 0:
-            async def delete_after_delay():
-                await asyncio.sleep(delay_seconds)
-                try:
-                    await sent.delete()
-                    logger.info(f"Message deleted after {delay_seconds}s")
-                except Exception as e:
-                    logger.error(f"Error deleting message: {e}")
-                
-                # Delete local file
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        logger.info(f"Local file deleted: {file_path}")
-                except Exception as e:
-                    logger.error(f"Error deleting file: {e}")
-            
-            asyncio.create_task(delete_after_delay())
+            _schedule_delete(sent, delay_seconds, None if in_memory else file_path)
+        return sent
         
     except Exception as e:
         logger.error(f"Error in send_and_delete: {e}")
         raise
 
+async def send_cached_and_delete(client, chat_id: int, file_id: str,
+                                 caption: str = None, delay_seconds: int = 300):
+    """Re-send an already uploaded document by file_id and auto-delete after delay.
+    
+    The file keeps the name it was first uploaded with.
+    """
+    sent = await client.send_document(chat_id, document=file_id, caption=caption or "")
+    logger.info(f"✅ Cached document sent: {file_id}")
+    from utils.database import db
+    await db.bump_stats(getattr(sent.document, 'file_size', 0) or 0)
+    if delay_seconds > 0:
+        _schedule_delete(sent, delay_seconds)
+    return sent
+
 async def create_or_edit_status(client, origin, text: str):
     """Create a new status message"""
     # Resolve chat id from origin
@@ -268,8 +319,6 @@ user_actions: Dict[int, List[datetime]] = {}
 
 def check_rate_limit(user_id: int, batch_mode: bool = False) -> bool:
     """Check if user is within rate limits"""
-    from utils.sessions import sessions
-    
     # Higher limit for batch mode
     rate_limit = 100 if batch_mode else 30
     
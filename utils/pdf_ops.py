@@ -0,0 +1,263 @@
+"""
+Process-pool PDF operations for PDF Bot
+Top-level functions taking plain paths/values so they pickle cleanly and run
+outside the event loop process. Each op reads from a path or raw bytes and
+either writes out_path (returning True) or, with out_path=None, returns the
+result bytes; False means the op refused to produce output.
+"""
+import io
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple, Union
+
+import pikepdf
+
+from utils.banner_cleaner import clean_pdf_banners
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# (static page numbers, remove last, remove middle), see split_pages_spec
+PagesSpec = Tuple[FrozenSet[int], bool, bool]
+
+PdfSource = Union[str, bytes]
+OpResult = Union[bool, bytes]
+
+# Per-process cache of opened banners: path -> (mtime_ns, Pdf). Each pool
+# worker parses a banner once instead of once per file it adds it to.
+_BANNER_CACHE_MAX = 32
+_banner_pdfs: Dict[str, Tuple[int, pikepdf.Pdf]] = {}
+
+# Regenerate object streams and compress everything on re-save: smaller
+# output means less to write to disk and upload back to Telegram
+_SAVE_OPTS = dict(
+    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+    compress_streams=True,
+    linearize=False,
+)
+
+# Page removal changes the structure anyway, so also re-deflate existing
+# Flate streams at the default level for the smallest upload
+_PAGES_SAVE_OPTS = dict(_SAVE_OPTS, recompress_flate=True)
+
+# Unlocking only drops the encryption: keep the object streams and pass the
+# stream data through untouched so the save is little more than a copy
+_UNLOCK_SAVE_OPTS = dict(
+    object_stream_mode=pikepdf.ObjectStreamMode.preserve,
+    stream_decode_level=pikepdf.StreamDecodeLevel.none,
+    compress_streams=False,
+    normalize_content=False,
+    linearize=False,
+)
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        # Never fork: by now Motor, Pyrogram and to_thread have started
+        # threads, and a forked child can inherit a lock one of them held
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context(method),
+        )
+    return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the pool's worker processes, if it was ever started"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def run_pdf_op(func, *args):
+    """Run one of the operations below in the process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pdf_pool(), func, *args)
+
+
+def _open_password(password: str) -> str:
+    return password if password and password.lower() != 'none' else ''
+
+
+def split_pages_spec(pages_to_remove: Iterable) -> PagesSpec:
+    """Classify a parsed removal set once per batch.
+
+    Returns (static page numbers, remove last, remove middle); the markers
+    can only be resolved per file, once the page count is known.
+    """
+    return (
+        frozenset(p for p in pages_to_remove if isinstance(p, int)),
+        "__LAST__" in pages_to_remove,
+        "__MIDDLE__" in pages_to_remove,
+    )
+
+
+def _effective_pages(spec: PagesSpec, total: int) -> set:
+    """Resolve a split spec against the page count, dropping out-of-range pages"""
+    static_pages, need_last, need_middle = spec
+    # Walk whichever side is smaller, so a wide range like 1-100000 against a
+    # short file costs one membership check per page, not per range entry
+    if len(static_pages) > total:
+        effective = {p for p in range(1, total + 1) if p in static_pages}
+    else:
+        effective = {p for p in static_pages if p <= total}
+    if total:
+        if need_last:
+            effective.add(total)
+        if need_middle:
+            effective.add(max(1, total // 2))
+    return effective
+
+
+def _get_banner(banner_path: str) -> pikepdf.Pdf:
+    """Open a banner once per worker process and reuse it for later files"""
+    mtime_ns = os.stat(banner_path).st_mtime_ns
+    cached = _banner_pdfs.get(banner_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    if cached:
+        cached[1].close()
+    elif len(_banner_pdfs) >= _BANNER_CACHE_MAX:
+        # Evict the oldest entry
+        _, old = _banner_pdfs.pop(next(iter(_banner_pdfs)))
+        old.close()
+    banner = pikepdf.open(banner_path)
+    _banner_pdfs[banner_path] = (mtime_ns, banner)
+    return banner
+
+
+def _open(src: PdfSource, password: str = '') -> pikepdf.Pdf:
+    """Open a path, or raw bytes for files downloaded in memory"""
+    if isinstance(src, bytes):
+        src = io.BytesIO(src)
+    return pikepdf.open(src, password=password)
+
+
+def _save(pdf: pikepdf.Pdf, out_path: Optional[str], **kwargs) -> OpResult:
+    """Save to out_path, or return the bytes when out_path is None"""
+    if out_path is not None:
+        pdf.save(out_path, **kwargs)
+        return True
+    buf = io.BytesIO()
+    pdf.save(buf, **kwargs)
+    return buf.getvalue()
+
+
+def _save_without_pages(pdf: pikepdf.Pdf, out_path: Optional[str], spec: PagesSpec) -> OpResult:
+    total = len(pdf.pages)
+    effective_remove = _effective_pages(spec, total)
+    if len(effective_remove) >= total:
+        return False
+
+    # Delete in place, back to front so earlier indices stay valid; this
+    # keeps the original object table instead of copying pages to a new Pdf
+    for idx in sorted(effective_remove, reverse=True):
+        del pdf.pages[idx - 1]
+    return _save(pdf, out_path, **_PAGES_SAVE_OPTS)
+
+
+def unlock(in_path: PdfSource, out_path: Optional[str], password: str) -> OpResult:
+    """Open with password and save without encryption"""
+    with _open(in_path, _open_password(password)) as pdf:
+        return _save(pdf, out_path, **_UNLOCK_SAVE_OPTS)
+
+
+def remove_pages(in_path: PdfSource, out_path: Optional[str], spec: PagesSpec) -> OpResult:
+    """Drop pages; returns False if nothing would be left"""
+    with _open(in_path) as pdf:
+        return _save_without_pages(pdf, out_path, spec)
+
+
+def unlock_and_remove_pages(in_path: PdfSource, out_path: Optional[str], password: str,
+                            spec: PagesSpec) -> OpResult:
+    """Unlock and drop pages in one open/save"""
+    with _open(in_path, _open_password(password)) as pdf:
+        return _save_without_pages(pdf, out_path, spec)
+
+
+def add_banner(in_path: PdfSource, out_path: Optional[str], banner_path: str,
+               place: str = "after") -> OpResult:
+    """Insert the banner PDF's pages before and/or after the document"""
+    banner = _get_banner(banner_path)
+    with _open(in_path) as pdf:
+        banner_pages = list(banner.pages)
+
+        if place in ("before", "both", None, ""):
+            for p in reversed(banner_pages):
+                pdf.pages.insert(0, p)
+
+        if place in ("after", "both"):
+            for p in banner_pages:
+                pdf.pages.append(p)
+
+        return _save(pdf, out_path, **_SAVE_OPTS)
+
+
+def lock(in_path: PdfSource, out_path: Optional[str], password: str) -> OpResult:
+    """Encrypt with the same user/owner password"""
+    with _open(in_path) as pdf:
+        enc = pikepdf.Encryption(user=password, owner=password, R=4)
+        return _save(pdf, out_path, encryption=enc)
+
+
+def full_process(in_path: PdfSource, out_path: Optional[str], unlock_pw: str,
+                 banner_path: Optional[str], spec: PagesSpec, lock_pw: str,
+                 user_id: Optional[int] = None) -> OpResult:
+    """Unlock -> clean banners -> add banner -> remove pages -> lock in one call.
+
+    Intermediate results stay in memory instead of going through temp files.
+    """
+    # 1. Unlock
+    if unlock_pw and unlock_pw.lower() != 'none':
+        with _open(in_path, unlock_pw) as pdf:
+            data = _save(pdf, None, **_UNLOCK_SAVE_OPTS)
+    elif isinstance(in_path, bytes):
+        data = in_path
+    else:
+        with open(in_path, 'rb') as f:
+            data = f.read()
+
+    # 2. Clean banners
+    data = clean_pdf_banners(data, user_id)
+
+    with _open(data) as pdf:
+        # 3. Add banner
+        if banner_path:
+            for p in list(_get_banner(banner_path).pages):
+                pdf.pages.append(p)
+
+        # 4. Remove pages
+        total = len(pdf.pages)
+        effective_remove = _effective_pages(spec, total)
+        if len(effective_remove) >= total:
+            return False
+        for idx in sorted(effective_remove, reverse=True):
+            del pdf.pages[idx - 1]
+
+        # 5. Lock
+        if lock_pw:
+            enc = pikepdf.Encryption(user=lock_pw, owner=lock_pw, R=4)
+            return _save(pdf, out_path, encryption=enc)
+        return _save(pdf, out_path, **_SAVE_OPTS)
+
+
+__all__ = [
+    'get_pdf_pool',
+    'shutdown_pdf_pool',
+    'run_pdf_op',
+    'split_pages_spec',
+    'unlock',
+    'remove_pages',
+    'unlock_and_remove_pages',
+    'add_banner',
+    'lock',
+    'full_process',
+]
@@ -18,16 +18,18 @@ CLEANUP_INTERVAL = 600  # 10 minutes
 
 def ensure_session_dict(user_id: int) -> Dict[str, Any]:
     """Ensure a session exists for the user and return it"""
-    if user_id not in sessions:
-        sessions[user_id] = {
-            'created_at': datetime.now(),
-            'last_activity': datetime.now()
+    now = datetime.now()
+    session = sessions.get(user_id)
+    if session is None:
+        session = sessions[user_id] = {
+            'created_at': now,
+            'last_activity': now
         }
     else:
         # Update last activity
-        sessions[user_id]['last_activity'] = datetime.now()
+        session['last_activity'] = now
     
-    return sessions[user_id]
+    return session
 
 def get_session(user_id: int) -> Optional[Dict[str, Any]]:
     """Get user session if exists"""
@@ -35,8 +37,7 @@ def get_session(user_id: int) -> Optional[Dict[str, Any]]:
 
 def clear_session(user_id: int):
     """Clear user session"""
-    if user_id in sessions:
-        del sessions[user_id]
+    if sessions.pop(user_id, None) is not None:
         logger.debug(f"Session cleared for user {user_id}")
 
 def set_session_value(user_id: int, key: str, value: Any):